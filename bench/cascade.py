@@ -0,0 +1,81 @@
+# bench/cascade.py — average job CPU time with the fusion cascade on and off
+#
+#   python -m bench.cascade --jobs 200 --size 2000000 --decided 0.3 --duplicates 0.2
+#
+# Builds a synthetic image workload where a fraction of the files carry an IPTC
+# trainedAlgorithmicMedia marker (decided by the cheap stages) and a fraction
+# are byte-identical resubmissions (decided by the hash cache), then runs
+# _pipeline over it once per strategy.
+import argparse, asyncio, json, os, random, shutil, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.common import isolate  # noqa: E402
+
+IPTC_MARKER = b"http://cv.iptc.org/newscodes/digitalsourcetype/trainedAlgorithmicMedia"
+
+def build_workload(root: str, jobs: int, size: int, decided: float, duplicates: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    paths, originals = [], []
+    for i in range(jobs):
+        if originals and rng.random() < duplicates:
+            paths.append(rng.choice(originals))
+            continue
+        body = bytearray(rng.randbytes(size))
+        if rng.random() < decided:
+            body[100:100 + len(IPTC_MARKER)] = IPTC_MARKER
+        path = os.path.join(root, f"img_{i}.png")
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n" + bytes(body))
+        paths.append(path)
+        originals.append(path)
+    return paths
+
+async def run(paths: list[str], strategy: str) -> dict:
+    # imports happen after isolate() so module-level paths use the scratch dir
+    from main import AnalyzeOptions, _pipeline
+    from utils import hashcache
+    from utils.jobs import JOBS, get_job
+
+    hashcache._CACHE.clear()
+    opts = AnalyzeOptions(fusion_strategy=strategy)
+    cpu, skipped = [], 0
+    wall = time.perf_counter()
+    for i, path in enumerate(paths):
+        t0 = time.process_time()
+        await _pipeline(f"bench_{strategy}_{i}", "image", path, opts)
+        cpu.append(time.process_time() - t0)
+    wall = time.perf_counter() - wall
+    for i in range(len(paths)):
+        if get_job(f"bench_{strategy}_{i}").get("skipped_stages"):
+            skipped += 1
+        JOBS.pop(f"bench_{strategy}_{i}", None)
+    return {
+        "strategy": strategy,
+        "jobs": len(paths),
+        "avg_cpu_ms": 1000 * sum(cpu) / len(cpu),
+        "total_cpu_s": sum(cpu),
+        "wall_s": wall,
+        "jobs_with_skipped_stages": skipped,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=200)
+    ap.add_argument("--size", type=int, default=2_000_000, help="bytes per file")
+    ap.add_argument("--decided", type=float, default=0.3, help="fraction with a decisive metadata marker")
+    ap.add_argument("--duplicates", type=float, default=0.2, help="fraction of resubmitted files")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    isolate()
+    root = tempfile.mkdtemp(prefix="bench_cascade_")
+    try:
+        paths = build_workload(root, args.jobs, args.size, args.decided, args.duplicates, args.seed)
+        results = [asyncio.run(run(paths, s)) for s in ("max", "cascade")]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    speedup = results[0]["avg_cpu_ms"] / results[1]["avg_cpu_ms"] if results[1]["avg_cpu_ms"] else None
+    print(json.dumps({"results": results, "cpu_speedup": speedup}, indent=2))
+
+if __name__ == "__main__":
+    main()
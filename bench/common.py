@@ -0,0 +1,111 @@
+# bench/common.py — shared helpers for the benchmark scripts
+import os, json, platform, sys, tempfile, time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+# isolate() changes directory, so user-supplied paths resolve against this
+_ORIG_CWD = os.getcwd()
+
+def isolate() -> str:
+    """
+    Points the SQLite DB, uploads, watchlist and metrics at a scratch dir.
+    Must run before main/utils are imported since they read env at import.
+    """
+    scratch = tempfile.mkdtemp(prefix="powerai_bench_")
+    os.environ.setdefault("POWERAI_DB_PATH", os.path.join(scratch, "powerai.db"))
+    os.environ.setdefault("IP_STORAGE_DIR", os.path.join(scratch, "uploads"))
+    os.environ.setdefault("IP_METRICS_DIR", os.path.join(scratch, "metrics"))
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.chdir(scratch)  # data/watchlist.json and friends land here too
+    return scratch
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+def summarize(latencies: List[float], elapsed: float) -> Dict:
+    """Latencies and elapsed in seconds; percentiles reported in milliseconds."""
+    vals = sorted(latencies)
+    n = len(vals)
+    return {
+        "n": n,
+        "p50_ms": 1000 * percentile(vals, 50),
+        "p95_ms": 1000 * percentile(vals, 95),
+        "p99_ms": 1000 * percentile(vals, 99),
+        "mean_ms": 1000 * sum(vals) / n if n else 0.0,
+        "throughput_per_s": n / elapsed if elapsed > 0 else 0.0,
+    }
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 10) -> Dict:
+    for _ in range(warmup):
+        fn()
+    lat = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    return summarize(lat, time.perf_counter() - start)
+
+def environment() -> Dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[Dict]:
+    """
+    Flags benchmarks whose p95 grew or throughput dropped by more than
+    tolerance (a fraction) against the stored baseline.
+    """
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get("p95_ms") and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append({"bench": name, "metric": "p95_ms", "baseline": base["p95_ms"], "current": cur["p95_ms"]})
+        if base.get("throughput_per_s") and cur["throughput_per_s"] < base["throughput_per_s"] * (1 - tolerance):
+            regressions.append({"bench": name, "metric": "throughput_per_s",
+                                "baseline": base["throughput_per_s"], "current": cur["throughput_per_s"]})
+    return regressions
+
+def report(suite: str, results: Dict[str, Dict], baseline_path: Optional[str], save_baseline: bool,
+           tolerance: float, output: Optional[str] = None) -> int:
+    """Prints the JSON report, updates/compares the baseline and returns an exit code."""
+    path = os.path.join(_ORIG_CWD, baseline_path) if baseline_path else DEFAULT_BASELINE
+    stored = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            stored = json.load(f)
+
+    doc = {"suite": suite, "environment": environment(), "results": results}
+    if save_baseline:
+        stored[suite] = results
+        with open(path, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+        doc["baseline"] = {"saved": path}
+        regressions = []
+    elif suite in stored:
+        regressions = compare(results, stored[suite], tolerance)
+        doc["baseline"] = {"path": path, "tolerance": tolerance, "regressions": regressions}
+    else:
+        regressions = []
+        doc["baseline"] = {"path": path, "missing": True}
+
+    text = json.dumps(doc, indent=2)
+    if output:
+        with open(os.path.join(_ORIG_CWD, output), "w") as f:
+            f.write(text)
+    print(text)
+    return 1 if regressions else 0
+
+def add_common_args(ap) -> None:
+    ap.add_argument("--baseline", help=f"baseline JSON (default: {DEFAULT_BASELINE})")
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed regression as a fraction (default: 0.15)")
+    ap.add_argument("--output", help="also write the JSON report to this file")
+    ap.add_argument("--seed", type=int, default=1)
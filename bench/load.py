@@ -0,0 +1,128 @@
+# bench/load.py — in-process load generator for main:app over an ASGI transport
+#
+#   python -m bench.load --requests 2000 --concurrency 32 \
+#       --mix analyze_image=3,analyze_audio=1,analyze_video=1,poll=10,enroll=1 \
+#       --payload-sizes 65536,1048576 [--save-baseline | --baseline FILE]
+#
+# No sockets or uvicorn are involved, so the numbers isolate application cost.
+# Analyze requests return 202 once the job is queued in the scheduler, so their
+# latencies cover admission, spooling and storage only. The run then waits for
+# every scheduled job to finish and reports that as "jobs" (drain time, job
+# throughput and final job states).
+import argparse, asyncio, os, random, sys, time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.common import add_common_args, isolate, report, summarize  # noqa: E402
+
+ANALYZE = {
+    "analyze_image": ("/v1/images:analyze", b"\x89PNG\r\n\x1a\n", "bench.png"),
+    "analyze_audio": ("/v1/audio:analyze", b"RIFF\x00\x00\x00\x00WAVE", "bench.wav"),
+    "analyze_video": ("/v1/videos:analyze", b"\x00\x00\x00\x18ftypisom", "bench.mp4"),
+}
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ANALYZE and name not in ("poll", "enroll"):
+            raise SystemExit(f"unknown op in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def run(args) -> dict:
+    import httpx
+    import main
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    ops, weights = list(mix), list(mix.values())
+    sizes = [int(s) for s in args.payload_sizes.split(",")]
+    payloads = {
+        (op, size): header + rng.randbytes(max(0, size - len(header)))
+        for op, (_, header, _) in ANALYZE.items() for size in sizes
+    }
+    job_ids: list[str] = []
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    remaining = args.requests
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(op: str):
+            if op in ANALYZE:
+                path, _, filename = ANALYZE[op]
+                body = payloads[(op, rng.choice(sizes))]
+                r = await client.post(path, files={"file": (filename, body)})
+                if r.status_code == 202:
+                    job_ids.append(r.json()["job_id"])
+                return r
+            if op == "poll":
+                job_id = rng.choice(job_ids) if job_ids else "job_missing"
+                return await client.get(f"/v1/jobs/{job_id}")
+            vector = [rng.random() for _ in range(args.vector_dim)]
+            return await client.post("/v1/watchlist:enroll", json={
+                "type": "face", "profile_id": f"bench_{rng.randrange(args.watchlist_size)}", "vector": vector,
+            })
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                op = rng.choices(ops, weights)[0]
+                t0 = time.perf_counter()
+                try:
+                    r = await one(op)
+                    statuses[op][r.status_code] += 1
+                except Exception as e:
+                    statuses[op][type(e).__name__] += 1
+                latencies[op].append(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        # jobs are tasks on this loop; finishing them also keeps asyncio.run
+        # from destroying pending tasks at shutdown
+        while main.SCHEDULER._tasks:
+            await asyncio.gather(*list(main.SCHEDULER._tasks), return_exceptions=True)
+        drained = time.perf_counter() - start
+
+    results = {op: summarize(lat, elapsed) for op, lat in latencies.items()}
+    results["all"] = summarize([x for lat in latencies.values() for x in lat], elapsed)
+    for op, counts in statuses.items():
+        results[op]["status"] = {str(k): v for k, v in counts.items()}
+    job_states = defaultdict(int)
+    for job_id in job_ids:
+        job_states[main.get_job(job_id).get("status", "unknown")] += 1
+    results["jobs"] = {
+        "n": len(job_ids),
+        "drain_s": drained - elapsed,
+        "throughput_per_s": len(job_ids) / drained if drained > 0 else 0.0,
+        "status": dict(job_states),
+    }
+    return results
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--mix", default="analyze_image=3,analyze_audio=1,analyze_video=1,poll=10,enroll=1")
+    ap.add_argument("--payload-sizes", default="65536,1048576", help="comma-separated analyze payload sizes in bytes")
+    ap.add_argument("--vector-dim", type=int, default=128)
+    ap.add_argument("--watchlist-size", type=int, default=100)
+    add_common_args(ap)
+    args = ap.parse_args()
+
+    # keep the rate limiter out of the way unless explicitly configured
+    os.environ.setdefault("BUCKET_CAPACITY", "1e12")
+    os.environ.setdefault("BUCKET_REFILL_RATE", "1e12")
+    isolate()
+    results = asyncio.run(run(args))
+    suite = f"load[c={args.concurrency},mix={args.mix},sizes={args.payload_sizes}]"
+    sys.exit(report(suite, results, args.baseline, args.save_baseline, args.tolerance, args.output))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,85 @@
+# bench/micro.py — micro-benchmarks for the request and pipeline hot paths
+#
+#   python -m bench.micro [--quick] [--save-baseline | --baseline FILE] [--tolerance 0.15]
+#
+# Covers the token bucket, API key lookup, face matching at several watchlist
+# sizes, score fusion, upload storage and the pseudo scorers. Prints a JSON
+# report with p50/p95/p99 and throughput per benchmark and exits 1 when a
+# benchmark regressed against the stored baseline.
+import argparse, os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.common import add_common_args, isolate, measure, report  # noqa: E402
+
+def run(quick: bool, seed: int) -> dict:
+    # imports happen after isolate() so module-level paths use the scratch dir
+    import main
+    from utils import auth, identity, storage
+    from utils.scoring import fuse
+    from ml.models import pseudo_image_score, pseudo_audio_score, pseudo_video_score
+
+    rng = random.Random(seed)
+    n = 200 if quick else 2000
+    results = {}
+
+    # ---- rate limiter ----
+    results["enforce_bucket"] = measure(lambda: main.enforce_bucket("sk_bench"), n)
+    main.init_bucket("sk_take", 1e12, 1e6)
+    results["take"] = measure(lambda: main.take("sk_take", 1.0, 1e12, 1e6), n)
+
+    # ---- auth ----
+    for i in range(1000):
+        email = f"user{i}@bench.local"
+        auth.USERS[email] = {"email": email, "api_key": f"sk_bench_{i:04d}", "plan": "free"}
+    keys = [f"sk_bench_{rng.randrange(1000):04d}" for _ in range(64)]
+    it = iter(range(10**9))
+    results["get_user_by_api_key[1000_users]"] = measure(lambda: auth.get_user_by_api_key(keys[next(it) % 64]), n)
+
+    # ---- identity ----
+    dim = 128
+    query = [rng.random() for _ in range(dim)]
+    for size in (10, 100, 1000):
+        db = {f"p{i}": {"type": "face", "vector": [rng.random() for _ in range(dim)]} for i in range(size)}
+        identity._save(db)
+        iters = max(20, n // size) if not quick else 20
+        results[f"match_face[{size}]"] = measure(lambda: identity.match_face(query, None), iters, warmup=2)
+
+    # ---- fusion ----
+    parts = {"image_gen": {"score": 0.4}, "video_deepfake": {"score": 0.7}, "audio_spoof": {"score": 0.2}}
+    results["fuse"] = measure(lambda: fuse("video", parts), n * 10)
+
+    # ---- storage + scorers ----
+    payload_sizes = (64 * 1024, 1024 * 1024) if quick else (64 * 1024, 1024 * 1024, 8 * 1024 * 1024)
+    for size in payload_sizes:
+        src = os.path.join(os.getcwd(), f"payload_{size}.bin")
+        with open(src, "wb") as f:
+            f.write(rng.randbytes(size))
+        label = f"{size // 1024}KiB"
+        iters = 20 if size > 1024 * 1024 or quick else 100
+
+        def save_and_drop():
+            _, dest = storage.save_upload(src, "bench.bin")
+            os.remove(dest)
+
+        results[f"save_upload[{label}]"] = measure(save_and_drop, iters, warmup=2)
+        results[f"pseudo_image_score[{label}]"] = measure(lambda: pseudo_image_score(src), iters, warmup=1)
+        results[f"pseudo_audio_score[{label}]"] = measure(lambda: pseudo_audio_score(src), iters, warmup=1)
+        results[f"pseudo_video_score[{label}]"] = measure(lambda: pseudo_video_score(src), iters, warmup=1)
+    return results
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--quick", action="store_true", help="fewer iterations, smaller payloads")
+    add_common_args(ap)
+    args = ap.parse_args()
+
+    # enforce_bucket runs thousands of times; keep the limiter from tripping
+    os.environ.setdefault("BUCKET_CAPACITY", "1e12")
+    os.environ.setdefault("BUCKET_REFILL_RATE", "1e12")
+    isolate()
+    results = run(args.quick, args.seed)
+    suite = "micro_quick" if args.quick else "micro"
+    sys.exit(report(suite, results, args.baseline, args.save_baseline, args.tolerance, args.output))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,100 @@
+# bench/results.py — bytes per job and serialization cost of job results
+#
+#   python -m bench.results [--polls 20] [--jobs 2000]
+#
+# Compares the old path (a nested dict kept in JOBS and re-encoded on every
+# poll and again for the webhook signature) with JobResult encoded once and
+# served from the stored bytes.
+import argparse, json, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.common import add_common_args, measure, report  # noqa: E402
+from utils import results as results_mod  # noqa: E402
+from utils.results import JobResult  # noqa: E402
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:  # measure plain json.dumps when FastAPI is not installed
+    jsonable_encoder = lambda x: x
+
+def sample_result(rng: random.Random, i: int) -> JobResult:
+    r = JobResult(job_id=f"job_{i:08x}", modality="image")
+    r.provenance = {"c2pa_present": True, "valid_chain": True, "details": {
+        "container": "jpeg", "boxes_scanned": 9,
+        "manifest_store": {"offset": 20, "length": 18000, "segments": [{"offset": 20, "length": 18000}], "reassembled": False},
+        "manifests": [{"label": f"urn:uuid:{rng.getrandbits(128):032x}", "kind": "manifest", "offset": 60, "length": 17000,
+                       "claim_generator": "Adobe Firefly", "has_claim": True, "has_signature": True,
+                       "assertions": ["c2pa.actions", "c2pa.hash.data", "c2pa.thumbnail.claim.jpeg"]}],
+        "active_manifest": "urn:uuid:1", "claim_generator": "Adobe Firefly", "validation": "structural"}}
+    r.watermarks = [{"type": "iptc_digital_source_type", "signature": "iptc_trained_algorithmic_media", "generator": None,
+                     "flag": "iptc:trainedAlgorithmicMedia", "detected": True, "confidence": 0.95, "count": 2,
+                     "offsets": [rng.randrange(1 << 20) for _ in range(2)]}]
+    r.image_gen = {"score": rng.random(), "cues": ["texture_stub", "metadata_stub"], "nn_score": rng.random()}
+    r.artifacts = {"metadata_flags": ["iptc:trainedAlgorithmicMedia"], "hashes": {"sha256": f"{rng.getrandbits(256):064x}"}}
+    r.limitations = []
+    r.final_score, r.label = 0.95, "likely_ai_or_manipulated"
+    r.thresholds = {"likely_ai_or_manipulated": 0.8, "likely_human": 0.2}
+    r.status = "completed"
+    return r
+
+def deep_size(obj, seen=None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v, seen) for v in obj)
+    return size
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=2000)
+    ap.add_argument("--polls", type=int, default=20, help="polls per job (plus one webhook)")
+    add_common_args(ap)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+    results = [sample_result(rng, i) for i in range(args.jobs)]
+    dicts = [json.loads(json.dumps(r.to_dict())) for r in results]  # old representation, no shared objects
+
+    old_encode = lambda d: json.dumps(jsonable_encoder(d)).encode("utf-8")
+    old_sign = lambda d: json.dumps(d, separators=(",", ":")).encode("utf-8")
+    it = iter(range(10**9))
+    bench = {
+        "old_poll_encode": measure(lambda: old_encode(dicts[next(it) % args.jobs]), args.jobs),
+        "old_webhook_sign_encode": measure(lambda: old_sign(dicts[next(it) % args.jobs]), args.jobs),
+        "new_encode_once": measure(lambda: results[next(it) % args.jobs].encode(), args.jobs),
+    }
+
+    bodies = [r.encode() for r in results]
+    start = time.perf_counter()
+    for _ in range(args.polls):
+        for d in dicts:
+            old_encode(d)
+    for d in dicts:
+        old_sign(d)
+    old_total = time.perf_counter() - start
+    start = time.perf_counter()
+    for r in results:
+        r.encode()
+    new_total = time.perf_counter() - start
+
+    bench["per_job"] = {
+        "old_bytes_in_store": sum(deep_size(d) for d in dicts) / args.jobs,
+        "new_bytes_in_store": sum(sys.getsizeof(b) for b in bodies) / args.jobs,
+        "encoded_json_bytes": sum(len(b) for b in bodies) / args.jobs,
+        "old_cpu_ms_per_job": 1000 * old_total / args.jobs,
+        "new_cpu_ms_per_job": 1000 * new_total / args.jobs,
+        "polls_per_job": args.polls,
+        "orjson": results_mod.orjson is not None,
+    }
+    # per_job is informational only; keep it out of the p95/throughput comparison
+    extra = bench.pop("per_job")
+    code = report("results_serialization", bench, args.baseline, args.save_baseline, args.tolerance, args.output)
+    print(json.dumps({"per_job": extra}, indent=2))
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,99 @@
+# bench/scheduler_sim.py — discrete-event simulation of job scheduling policies
+#
+#   python -m bench.scheduler_sim [--flood 2000] [--pro-tenants 4] [--duration 600]
+#
+# One free-tier tenant dumps a burst of videos at t=0 while pro and free
+# tenants keep submitting images. The same workload is replayed through the
+# FairQueue policy in "fifo" mode (the old BackgroundTasks behaviour) and in
+# "wfq" mode with admission control, and queue-wait percentiles are reported
+# per tenant class together with admission rejections.
+import argparse, heapq, os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.common import add_common_args, percentile, report  # noqa: E402
+from utils.scheduler import FairQueue, job_cost  # noqa: E402
+
+def workload(args, rng: random.Random) -> list:
+    """Returns sorted (arrival, tenant, plan, klass, modality)."""
+    arrivals = [(0.0, "free_flood", "free", "free_flood_video", "video") for _ in range(args.flood)]
+    for i in range(args.pro_tenants):
+        t = 0.0
+        while True:
+            t += rng.expovariate(args.pro_rate)
+            if t > args.duration:
+                break
+            arrivals.append((t, f"pro_{i}", "pro", "pro_image", "image"))
+    for i in range(args.free_tenants):
+        t = 0.0
+        while True:
+            t += rng.expovariate(args.free_rate)
+            if t > args.duration:
+                break
+            arrivals.append((t, f"free_{i}", "free", "free_image", "image"))
+    arrivals.sort(key=lambda a: a[0])
+    return arrivals
+
+def simulate(policy: str, arrivals: list, args, rng: random.Random) -> dict:
+    q = FairQueue(workers=args.workers, unit_seconds=args.unit_seconds, policy=policy)
+    waits, rejected = {}, {}
+    completions = []  # (finish, tenant, cost, start)
+    i, now = 0, 0.0
+
+    def start_ready():
+        while True:
+            nxt = q.pop()
+            if nxt is None:
+                return
+            tenant, cost, (arrival, klass) = nxt
+            waits.setdefault(klass, []).append(now - arrival)
+            service = cost * args.unit_seconds * rng.uniform(0.8, 1.2)
+            heapq.heappush(completions, (now + service, tenant, cost, service))
+
+    while i < len(arrivals) or completions:
+        if completions and (i >= len(arrivals) or completions[0][0] <= arrivals[i][0]):
+            now, tenant, cost, service = heapq.heappop(completions)
+            q.done(tenant, cost, service)
+        else:
+            now, tenant, plan, klass, modality = arrivals[i]
+            i += 1
+            if policy != "fifo" and not q.admit(tenant, plan)[0]:
+                rejected[klass] = rejected.get(klass, 0) + 1
+                continue
+            q.push(tenant, plan, job_cost(modality), (now, klass))
+        start_ready()
+
+    out = {}
+    for klass, w in sorted(waits.items()):
+        w.sort()
+        out[f"{policy}/{klass}"] = {
+            "n": len(w),
+            "rejected": rejected.get(klass, 0),
+            "p50_ms": 1000 * percentile(w, 50),
+            "p95_ms": 1000 * percentile(w, 95),
+            "p99_ms": 1000 * percentile(w, 99),
+            "mean_ms": 1000 * sum(w) / len(w),
+            "throughput_per_s": len(w) / now if now else 0.0,
+        }
+    return out
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--flood", type=int, default=2000, help="videos submitted at t=0 by one free tenant")
+    ap.add_argument("--pro-tenants", type=int, default=4)
+    ap.add_argument("--pro-rate", type=float, default=0.5, help="images/s per pro tenant")
+    ap.add_argument("--free-tenants", type=int, default=8)
+    ap.add_argument("--free-rate", type=float, default=0.05, help="images/s per free tenant")
+    ap.add_argument("--duration", type=float, default=600.0, help="seconds of steady traffic")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--unit-seconds", type=float, default=0.5, help="service seconds per cost unit")
+    add_common_args(ap)
+    args = ap.parse_args()
+
+    arrivals = workload(args, random.Random(args.seed))
+    results = {}
+    for policy in ("fifo", "wfq"):
+        results.update(simulate(policy, arrivals, args, random.Random(args.seed)))
+    sys.exit(report("scheduler_sim", results, args.baseline, args.save_baseline, args.tolerance, args.output))
+
+if __name__ == "__main__":
+    main_cli()
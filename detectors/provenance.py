@@ -1,4 +1,297 @@
-from typing import Dict
+import mmap, os, struct
+from typing import Dict, List, Optional, Tuple
+
+# C2PA manifest stores are JUMBF superboxes (ISO 19566-5) embedded in the
+# container: JPEG APP11 segments, a PNG `caBX` chunk or a top-level BMFF `uuid`
+# box. We mmap the upload and only walk container headers, so lookup cost is
+# proportional to the number of segments/chunks/boxes, never to the file size.
+
+C2PA_BMFF_UUID = bytes.fromhex("d8fec3d61b0e483c92975828877ec481")
+
+# First four bytes of the JUMBF description type UUIDs used by C2PA
+C2PA_TYPES = {
+    b"c2pa": "manifest_store",
+    b"c2ma": "manifest",
+    b"c2um": "update_manifest",
+    b"c2as": "assertion_store",
+    b"c2cl": "claim",
+    b"c2cs": "signature",
+}
+
+MAX_BOX_DEPTH = 8
+
+def _u16(buf, off: int) -> int:
+    return struct.unpack_from(">H", buf, off)[0]
+
+def _u32(buf, off: int) -> int:
+    return struct.unpack_from(">I", buf, off)[0]
+
+def _u64(buf, off: int) -> int:
+    return struct.unpack_from(">Q", buf, off)[0]
+
+def _box_header(buf, off: int, end: int) -> Optional[Tuple[bytes, int, int]]:
+    """Returns (type, payload_start, box_end) for an ISO-BMFF / JUMBF box header."""
+    # declared lengths are untrusted: a box may never extend past the buffer
+    end = min(end, len(buf))
+    if off + 8 > end:
+        return None
+    size = _u32(buf, off)
+    typ = buf[off + 4:off + 8]
+    payload = off + 8
+    if size == 1:
+        if off + 16 > end:
+            return None
+        size = _u64(buf, off + 8)
+        payload = off + 16
+    elif size == 0:
+        size = end - off
+    if size < payload - off or off + size > end:
+        return None
+    return typ, payload, off + size
+
+def _iter_boxes(buf, start: int, end: int):
+    off = start
+    while off < end:
+        hdr = _box_header(buf, off, end)
+        if hdr is None:
+            return
+        typ, payload, box_end = hdr
+        yield typ, off, payload, box_end
+        off = box_end
+
+# ---------- JUMBF ----------
+def _parse_jumd(buf, start: int, end: int) -> Dict:
+    end = min(end, len(buf))
+    if start + 17 > end:
+        return {}
+    typ = buf[start:start + 16]
+    toggles = buf[start + 16]
+    label = None
+    if toggles & 0x02:
+        nul = buf.find(b"\x00", start + 17, end)
+        if nul != -1:
+            label = buf[start + 17:nul].decode("utf-8", errors="replace")
+    return {"type": typ, "label": label}
+
+def _cbor_text(buf: bytes, off: int) -> Optional[str]:
+    """Decodes a CBOR text string (major type 3) starting at off."""
+    if off >= len(buf) or buf[off] >> 5 != 3:
+        return None
+    info = buf[off] & 0x1f
+    if info < 24:
+        n, off = info, off + 1
+    elif info == 24 and off + 2 <= len(buf):
+        n, off = buf[off + 1], off + 2
+    elif info == 25 and off + 3 <= len(buf):
+        n, off = _u16(buf, off + 1), off + 3
+    else:
+        return None
+    if off + n > len(buf):
+        return None
+    return buf[off:off + n].decode("utf-8", errors="replace")
+
+def _claim_generator(claim: bytes) -> Optional[str]:
+    # v1 claims carry a `claim_generator` string, v2 a `claim_generator_info` list of maps
+    pos = claim.find(b"\x6fclaim_generator")
+    if pos != -1:
+        return _cbor_text(claim, pos + 16)
+    pos = claim.find(b"\x74claim_generator_info")
+    if pos != -1:
+        name = claim.find(b"\x64name", pos)
+        if name != -1:
+            return _cbor_text(claim, name + 5)
+    return None
+
+def _parse_superbox(buf, start: int, end: int, base: int, depth: int = 0) -> Dict:
+    node = {"label": None, "kind": None, "offset": base + start, "length": end - start, "children": []}
+    hdr = _box_header(buf, start, end)
+    if hdr is None or hdr[0] != b"jumb":
+        return node
+    _, payload, box_end = hdr
+    node["length"] = box_end - start
+    for typ, off, body, child_end in _iter_boxes(buf, payload, box_end):
+        if typ == b"jumd":
+            desc = _parse_jumd(buf, body, child_end)
+            node["label"] = desc.get("label")
+            node["kind"] = C2PA_TYPES.get(bytes(desc.get("type", b""))[:4])
+        elif typ == b"jumb" and depth < MAX_BOX_DEPTH:
+            node["children"].append(_parse_superbox(buf, off, child_end, base, depth + 1))
+        elif typ == b"cbor" and node["kind"] == "claim":
+            node["claim_generator"] = _claim_generator(bytes(buf[body:child_end]))
+    return node
+
+def _manifest_chain(store: Dict) -> List[Dict]:
+    chain = []
+    for m in store["children"]:
+        if m["kind"] not in ("manifest", "update_manifest"):
+            continue
+        entry = {
+            "label": m["label"],
+            "kind": m["kind"],
+            "offset": m["offset"],
+            "length": m["length"],
+            "claim_generator": None,
+            "has_claim": False,
+            "has_signature": False,
+            "assertions": [],
+        }
+        for c in m["children"]:
+            if c["kind"] == "claim":
+                entry["has_claim"] = True
+                entry["claim_generator"] = c.get("claim_generator")
+            elif c["kind"] == "signature":
+                entry["has_signature"] = True
+            elif c["kind"] == "assertion_store":
+                entry["assertions"] = [a["label"] for a in c["children"] if a["label"]]
+        chain.append(entry)
+    return chain
+
+# ---------- Containers ----------
+def _jpeg_store(mm) -> Tuple[List[Tuple[int, int]], int]:
+    """Collects the APP11 JUMBF packets of the C2PA store as (offset, length) spans."""
+    instances: Dict[int, List[Tuple[int, int, int]]] = {}
+    labels: Dict[int, Optional[str]] = {}
+    segments = 0
+    off, size = 2, len(mm)
+    while off + 4 <= size:
+        if mm[off] != 0xFF:
+            break
+        marker = mm[off + 1]
+        if marker == 0xFF:
+            off += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            off += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            # manifests must precede the entropy-coded scan data
+            break
+        length = _u16(mm, off + 2)
+        seg_start, seg_end = off + 4, min(off + 2 + length, size)
+        segments += 1
+        if marker == 0xEB and seg_end - seg_start > 16 and mm[seg_start:seg_start + 2] == b"JP":
+            en = _u16(mm, seg_start + 2)
+            seq = _u32(mm, seg_start + 4)
+            box = seg_start + 8
+            if seq == 1:
+                hdr = _box_header(mm, box, size)
+                if hdr and hdr[0] == b"jumb":
+                    jumd = _box_header(mm, hdr[1], seg_end)
+                    if jumd and jumd[0] == b"jumd":
+                        labels[en] = _parse_jumd(mm, jumd[1], jumd[2]).get("label")
+                instances.setdefault(en, []).append((seq, box, seg_end - box))
+            else:
+                # continuation packets repeat the LBox/TBox (and XLBox) header
+                skip = 16 if _u32(mm, box) == 1 else 8
+                instances.setdefault(en, []).append((seq, box + skip, seg_end - box - skip))
+        off = seg_end
+    for en, label in labels.items():
+        if label == "c2pa":
+            return [(o, n) for _, o, n in sorted(instances[en])], segments
+    return [], segments
+
+def _png_store(mm) -> Tuple[List[Tuple[int, int]], int]:
+    chunks = 0
+    off, size = 8, len(mm)
+    while off + 12 <= size:
+        length = _u32(mm, off)
+        typ = mm[off + 4:off + 8]
+        chunks += 1
+        if typ == b"caBX":
+            # a truncated chunk is clamped; its boxes then fail the bounds checks
+            return [(off + 8, min(length, size - off - 8))], chunks
+        if typ == b"IEND":
+            break
+        off += 12 + length
+    return [], chunks
+
+def _bmff_store(mm) -> Tuple[List[Tuple[int, int]], int]:
+    boxes = 0
+    size = len(mm)
+    for typ, off, payload, box_end in _iter_boxes(mm, 0, size):
+        boxes += 1
+        if typ == b"jumb":
+            # standalone .c2pa sidecar: the whole file is the manifest store
+            return [(off, box_end - off)], boxes
+        if typ != b"uuid" or mm[payload:payload + 16] != C2PA_BMFF_UUID:
+            continue
+        p = payload + 16 + 4  # usertype + FullBox version/flags
+        nul = mm.find(b"\x00", p, box_end)
+        if nul == -1 or mm[p:nul] != b"manifest":
+            continue
+        p = nul + 1 + 8  # purpose string + merkle aux uuid offset
+        return [(p, box_end - p)], boxes
+    return [], boxes
+
+def _sniff(mm) -> str:
+    head = mm[:12]
+    if head[:2] == b"\xff\xd8":
+        return "jpeg"
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if head[4:8] in (b"ftyp", b"jumb", b"moov", b"mdat", b"free", b"wide", b"uuid"):
+        return "bmff"
+    return "unknown"
+
+def locate_manifest_store(file_path: str) -> Dict:
+    """
+    Walks the container structure of file_path and returns the C2PA manifest
+    store location plus its parsed JUMBF tree. Only container headers and the
+    manifest bytes themselves are touched.
+    """
+    out = {"container": "unknown", "boxes_scanned": 0, "segments": [], "store": None}
+    if os.path.getsize(file_path) == 0:
+        return out
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        container = _sniff(mm)
+        out["container"] = container
+        walker = {"jpeg": _jpeg_store, "png": _png_store, "bmff": _bmff_store}.get(container)
+        if walker is None:
+            return out
+        spans, out["boxes_scanned"] = walker(mm)
+        if not spans:
+            return out
+        out["segments"] = [{"offset": o, "length": n} for o, n in spans]
+        if len(spans) == 1:
+            # parse in place; offsets reported are absolute file offsets
+            o, n = spans[0]
+            out["store"] = _parse_superbox(mm, o, o + n, 0)
+        else:
+            # multi-packet JPEG stores are reassembled (manifest bytes only);
+            # offsets are then relative to the reassembled store
+            buf = b"".join(mm[o:o + n] for o, n in spans)
+            out["store"] = _parse_superbox(buf, 0, len(buf), 0)
+            out["store"]["reassembled"] = True
+    return out
 
 def check_c2pa(file_path: str) -> Dict:
-    return {"c2pa_present": False, "valid_chain": False, "details": {}}
+    try:
+        loc = locate_manifest_store(file_path)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        return {"c2pa_present": False, "valid_chain": False, "details": {"error": str(e)}}
+
+    details = {
+        "container": loc["container"],
+        "boxes_scanned": loc["boxes_scanned"],
+    }
+    store = loc["store"]
+    if not store or store["kind"] != "manifest_store":
+        return {"c2pa_present": False, "valid_chain": False, "details": details}
+
+    chain = _manifest_chain(store)
+    details.update({
+        "manifest_store": {
+            "offset": store["offset"],
+            "length": store["length"],
+            "segments": loc["segments"],
+            "reassembled": store.get("reassembled", False),
+        },
+        "manifests": chain,
+        # the active manifest is the last one in the store
+        "active_manifest": chain[-1]["label"] if chain else None,
+        "claim_generator": chain[-1]["claim_generator"] if chain else None,
+        # structural check only: every manifest carries a claim and a signature
+        "validation": "structural",
+    })
+    valid = bool(chain) and all(m["has_claim"] and m["has_signature"] for m in chain)
+    return {"c2pa_present": True, "valid_chain": valid, "details": details}
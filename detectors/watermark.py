@@ -1,4 +1,169 @@
-from typing import List, Dict
+import json, mmap, os, re
+from typing import List, Dict, Optional, Tuple
 
-def scan_watermarks(file_path: str, modality: str) -> List[Dict]:
-    return [{"type": "synthid", "detected": False, "confidence": 0.01}]
+# Metadata-embedded generator markers. Every signature is a bytes regex plus
+# the literals a match can start with. The upload's mmap is searched for the
+# literals with bytes.find (memchr speed) and the full pattern is only run,
+# anchored, at each literal hit. Signatures without literals fall back to one
+# combined regex pass. Extra signatures can be supplied as a JSON list of the
+# same shape through IP_WATERMARK_SIGNATURES.
+DEFAULT_SIGNATURES: List[Dict] = [
+    # IPTC DigitalSourceType vocabulary (XMP Iptc4xmpExt / IPTC IIM)
+    {"id": "iptc_composite_trained_algorithmic_media", "type": "iptc_digital_source_type",
+     "pattern": r"compositeWithTrainedAlgorithmicMedia", "literals": ["compositeWith"],
+     "flag": "iptc:compositeWithTrainedAlgorithmicMedia", "confidence": 0.90},
+    {"id": "iptc_trained_algorithmic_media", "type": "iptc_digital_source_type",
+     "pattern": r"\btrainedAlgorithmicMedia", "literals": ["trainedAlgorithmicMedia"],
+     "flag": "iptc:trainedAlgorithmicMedia", "confidence": 0.95},
+    {"id": "iptc_algorithmic_media", "type": "iptc_digital_source_type",
+     "pattern": r"digitalsourcetype/algorithmicMedia", "literals": ["digitalsourcetype/"],
+     "flag": "iptc:algorithmicMedia", "confidence": 0.85},
+    # EXIF Software / XMP CreatorTool strings written by known generators
+    {"id": "software_midjourney", "type": "generator_software", "generator": "midjourney",
+     "pattern": r"Midjourney", "literals": ["Midjourney"], "flag": "generator:midjourney", "confidence": 0.70},
+    {"id": "software_dalle", "type": "generator_software", "generator": "dall-e",
+     "pattern": r"DALL[\-\xc2\xb7 ]{1,2}E", "literals": ["DALL"], "flag": "generator:dall-e", "confidence": 0.70},
+    {"id": "software_firefly", "type": "generator_software", "generator": "adobe_firefly",
+     "pattern": r"Adobe Firefly", "literals": ["Adobe Firefly"], "flag": "generator:adobe_firefly", "confidence": 0.70},
+    {"id": "software_stable_diffusion", "type": "generator_software", "generator": "stable_diffusion",
+     "pattern": r"Stable[ _]?Diffusion", "literals": ["Stable"],
+     "flag": "generator:stable_diffusion", "confidence": 0.70},
+    {"id": "software_google_ai", "type": "generator_software", "generator": "google_imagen",
+     "pattern": r"Made with Google AI|Google Imagen",
+     "literals": ["Made with Google AI", "Google Imagen"], "flag": "generator:google_imagen", "confidence": 0.70},
+    # Tool signatures: generation parameters left in PNG text chunks
+    {"id": "tool_a1111_parameters", "type": "tool_signature", "generator": "automatic1111",
+     "pattern": r"tEXtparameters\x00.{0,4096}?Steps: \d+, Sampler: ", "literals": ["tEXt"],
+     "flag": "tool:automatic1111", "confidence": 0.90},
+    {"id": "tool_comfyui_workflow", "type": "tool_signature", "generator": "comfyui",
+     "pattern": r"tEXt(?:prompt|workflow)\x00\{", "literals": ["tEXt"], "flag": "tool:comfyui", "confidence": 0.85},
+    {"id": "tool_novelai", "type": "tool_signature", "generator": "novelai",
+     "pattern": r"tEXtSoftware\x00NovelAI", "literals": ["tEXt"], "flag": "tool:novelai", "confidence": 0.90},
+]
+
+SIGNATURES_PATH = os.environ.get("IP_WATERMARK_SIGNATURES")
+# "full" scans the whole file; "edges" only the header/trailer windows,
+# which is where EXIF/XMP/IPTC and PNG text chunks normally live. Unset means
+# full scans for images and edges for audio/video, whose payloads are large
+# and carry their metadata in the container header or trailer.
+SCAN_REGION = os.environ.get("IP_WATERMARK_SCAN_REGION")
+DEFAULT_REGION = {"image": "full", "audio": "edges", "video": "edges"}
+EDGE_BYTES = int(os.environ.get("IP_WATERMARK_EDGE_BYTES", str(256 * 1024)))
+MAX_OFFSETS = 16
+
+def load_signatures(path: Optional[str] = None) -> List[Dict]:
+    sigs = list(DEFAULT_SIGNATURES)
+    path = path or SIGNATURES_PATH
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            sigs.extend(json.load(f))
+    return sigs
+
+def _latin1(s: str) -> bytes:
+    # latin-1 keeps \xNN escapes and raw bytes 1:1
+    return s.encode("latin-1")
+
+Compiled = Tuple[
+    Dict[bytes, List[Tuple[re.Pattern, Dict]]],
+    Optional[Tuple[re.Pattern, Dict[int, Dict]]],
+]
+
+def compile_signatures(signatures: List[Dict]) -> Compiled:
+    """
+    Returns (by_literal, fallback). by_literal maps each prefilter literal to
+    the (anchored pattern, signature) pairs to confirm at its hits; fallback is
+    one alternation over the signatures without literals plus a map from its
+    outer capturing group index to the signature, or None.
+    """
+    by_literal: Dict[bytes, List[Tuple[re.Pattern, Dict]]] = {}
+    parts, by_group, group = [], {}, 1
+    for sig in signatures:
+        pat = _latin1(sig["pattern"])
+        literals = sig.get("literals")
+        if literals:
+            compiled = re.compile(pat, re.DOTALL)
+            for lit in literals:
+                by_literal.setdefault(_latin1(lit), []).append((compiled, sig))
+            continue
+        by_group[group] = sig
+        group += 1 + re.compile(pat).groups
+        parts.append(b"(" + pat + b")")
+    fallback = (re.compile(b"|".join(parts), re.DOTALL), by_group) if parts else None
+    return by_literal, fallback
+
+_COMPILED: Optional[Compiled] = None
+
+def _default_compiled() -> Compiled:
+    global _COMPILED
+    if _COMPILED is None:
+        _COMPILED = compile_signatures(load_signatures())
+    return _COMPILED
+
+def _windows(size: int, region: str) -> List[Tuple[int, int]]:
+    if region == "edges" and size > 2 * EDGE_BYTES:
+        return [(0, EDGE_BYTES), (size - EDGE_BYTES, size)]
+    return [(0, size)]
+
+def _region(modality: str, region: Optional[str] = None) -> str:
+    return region or SCAN_REGION or DEFAULT_REGION.get(modality, "full")
+
+def scanned_bytes(size: int, modality: str, region: Optional[str] = None) -> int:
+    """Bytes scan_watermarks covers for a file of size bytes."""
+    return sum(end - start for start, end in _windows(size, _region(modality, region)))
+
+def _record(hits: Dict[str, Dict], sig: Dict, offset: int) -> None:
+    hit = hits.get(sig["id"])
+    if hit is None:
+        hit = hits[sig["id"]] = {
+            "type": sig["type"],
+            "signature": sig["id"],
+            "generator": sig.get("generator"),
+            "flag": sig.get("flag", sig["id"]),
+            "detected": True,
+            "confidence": sig.get("confidence", 0.5),
+            "count": 0,
+            "offsets": [],
+        }
+    hit["count"] += 1
+    if len(hit["offsets"]) < MAX_OFFSETS:
+        hit["offsets"].append(offset)
+
+def scan_watermarks(
+    file_path: str,
+    modality: str,
+    region: Optional[str] = None,
+    signatures: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    """
+    Scans file_path for metadata generator signatures and returns one entry
+    per signature that hit, with the byte offsets of its matches.
+    """
+    if signatures is None:
+        by_literal, fallback = _default_compiled()
+    else:
+        by_literal, fallback = compile_signatures(signatures)
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+    region = _region(modality, region)
+
+    hits: Dict[str, Dict] = {}
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start, end in _windows(size, region):
+            for lit, candidates in by_literal.items():
+                pos = mm.find(lit, start, end)
+                while pos != -1:
+                    for pattern, sig in candidates:
+                        if pattern.match(mm, pos, end):
+                            _record(hits, sig, pos)
+                    pos = mm.find(lit, pos + 1, end)
+            if fallback is not None:
+                pattern, by_group = fallback
+                for m in pattern.finditer(mm, start, end):
+                    _record(hits, by_group[m.lastindex], m.start())
+    out = list(hits.values())
+    out.sort(key=lambda h: h["offsets"][0])
+    return out
+
+def metadata_flags(watermarks: List[Dict]) -> List[str]:
+    return sorted({w["flag"] for w in watermarks if w.get("detected") and w.get("flag")})
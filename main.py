@@ -1,33 +1,44 @@
 # main.py (PowerAI) — token-bucket rate limiting (SQLite persisted)
-import os, json, tempfile, uuid, stripe
+import os, json, hmac, tempfile, threading, time, uuid, stripe
+from contextlib import contextmanager
 from typing import Optional
 
 from fastapi import (
-    FastAPI, UploadFile, File, BackgroundTasks, HTTPException,
+    FastAPI, UploadFile, File, HTTPException,
     Request, Depends, Header
 )
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, PlainTextResponse, Response
 from starlette.middleware.sessions import SessionMiddleware
 from pydantic import BaseModel, Field
 
 # ==== Rate limiting (token bucket, persistent via SQLite) ====
-from utils.usage_bucket import init_bucket, take
+from utils.usage_bucket import init_bucket, take, available
 
 # ==== Core utilities ====
-from utils.scoring import DEFAULT_THRESHOLDS, fuse
+from utils.scoring import FUSION_STRATEGY, fuse, cheap_verdict, fusion_config
+from utils.hashcache import file_digest, sample_digest, lookup as hash_lookup, store as hash_store
 from utils.storage import save_upload
-from utils.jobs import set_job, get_job
+from utils.jobs import set_job, set_job_encoded, get_job, get_job_encoded
+from utils.results import JobResult, encode_json
+from utils.batch import (
+    MODALITY_COST, BATCH_COST_FACTOR, BATCH_MAX_ITEMS, detect_modality, batch_cost, iter_archive,
+    batch_status, move_count
+)
 from utils.identity import enroll as id_enroll, delete as id_delete, match_face, match_voice
 from utils.auth import (
     create_user, verify_user, get_user,
     get_user_by_api_key, set_user_plan
 )
 from utils.webhook import post_webhook
+from utils.metrics import timed, inc, gauge_add, in_flight, render_prometheus
+from utils.tracing import span, WORKER_ID
+from utils.scheduler import SCHEDULER, BATCH_SLO_SECONDS, job_cost
+from utils.static import StaticCache
+from utils.profiler import sample as profile_sample, collapsed
 
 # ==== Detectors / ML stubs ====
 from detectors.provenance import check_c2pa
-from detectors.watermark import scan_watermarks
+from detectors.watermark import scan_watermarks, scanned_bytes, metadata_flags
 from detectors.visual import analyze_video
 from detectors.imagegen import analyze_image
 from detectors.audio import analyze_audio
@@ -39,6 +50,7 @@ APP_VERSION = "1.5.0"
 # ---- Secrets & toggles ----
 APP_SECRET = os.environ.get("IP_SESSION_SECRET", "dev_session_secret")
 REQUIRE_AUTH = os.environ.get("IP_REQUIRE_AUTH", "0") == "1"
+ADMIN_TOKEN = os.environ.get("IP_ADMIN_TOKEN")  # enables /admin/* when set
 
 # Token bucket defaults (env configurable)
 # Capacity = burst size in tokens; refill_rate = tokens per second (e.g., 1 = ~60/min)
@@ -56,15 +68,13 @@ if STRIPE_SECRET_KEY:
 app = FastAPI(title=APP_NAME, version=APP_VERSION)
 app.add_middleware(SessionMiddleware, secret_key=APP_SECRET)
 
-# Serve frontend (Vite dist)
-if os.path.isdir("web/dist"):
-    app.mount("/assets", StaticFiles(directory="web/dist/assets"), name="assets")
+# Serve frontend (Vite dist) from memory, precompressed, reloaded on rebuild
+STATIC = StaticCache(os.path.join("web", "dist"))
 
-def spa_index() -> HTMLResponse:
-    index_path = os.path.join("web", "dist", "index.html")
-    if os.path.exists(index_path):
-        with open(index_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(f.read())
+def spa_index(request: Request) -> Response:
+    resp = STATIC.response("index.html", request.headers)
+    if resp is not None:
+        return resp
     return HTMLResponse(f"<h1>{APP_NAME}</h1><p>Build the frontend to see the UI.</p>")
 
 # ---------- Auth: sessions & API Keys ----------
@@ -89,7 +99,8 @@ def api_key_user(
         token = x_api_key.strip()
     if not token:
         return None
-    return get_user_by_api_key(token)
+    with timed("powerai_auth_lookup_seconds"):
+        return get_user_by_api_key(token)
 
 def require_auth_or_api_key(
     session_user = Depends(current_user),
@@ -119,11 +130,37 @@ def enforce_bucket(api_key: str, cost: float = 1.0):
     Token-bucket limiter (SQLite persisted).
     cost=1 token per request by default (tune per-endpoint if needed).
     """
-    init_bucket(api_key, BUCKET_CAPACITY, BUCKET_REFILL_RATE)
-    ok, details = take(api_key, cost, BUCKET_CAPACITY, BUCKET_REFILL_RATE)
+    with timed("powerai_rate_limit_seconds"):
+        init_bucket(api_key, BUCKET_CAPACITY, BUCKET_REFILL_RATE)
+        ok, details = take(api_key, cost, BUCKET_CAPACITY, BUCKET_REFILL_RATE)
     if not ok:
+        inc("powerai_rate_limited_total")
         raise HTTPException(429, {"error": "rate_limited", "bucket": details})
 
+def plan_for(user, header_user) -> str:
+    """Plan of the tenant whose key active_api_key_for() picked."""
+    if header_user and header_user.get("api_key"):
+        return header_user.get("plan", "free")
+    if user and user.get("api_key"):
+        return user.get("plan", "free")
+    # every unauthenticated client shares the "anon" tenant (IP_REQUIRE_AUTH=0)
+    return "anon"
+
+def admit_job(api_key: str, plan: str, slo: float | None = None, cost: float = 1.0):
+    """
+    Rejects early when the estimated queue wait for this tenant exceeds the
+    plan's SLO, so clients back off instead of piling up work. Batches pass
+    the summed scheduler cost of their items.
+    """
+    ok, retry_after, est = SCHEDULER.admit(api_key, plan, slo, cost)
+    if not ok:
+        inc("powerai_sched_rejected_total", plan=plan)
+        raise HTTPException(
+            429,
+            {"error": "queue_full", "estimated_wait_seconds": round(est, 1), "retry_after_seconds": retry_after},
+            headers={"Retry-After": str(int(retry_after))},
+        )
+
 @app.post("/auth/register")
 def register(req: AuthReq, request: Request):
     try:
@@ -157,6 +194,11 @@ def me(user = Depends(current_user)):
 def metrics():
     return metrics_stub()
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Runtime metrics of all workers in Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/v1/models")
 def list_models():
     """
@@ -168,13 +210,10 @@ def list_models():
             "vision": {"name": "vision_v0", "version": "0.1.0"},
             "audio":  {"name": "audio_v0", "version": "0.1.0"},
             "video":  {"name": "video_v0", "version": "0.1.0"},
-            "provenance": {"name": "c2pa_stub", "version": "0.1.0"},
-            "watermark":  {"name": "watermark_stub", "version": "0.1.0"},
+            "provenance": {"name": "c2pa_locator", "version": "0.2.0"},
+            "watermark":  {"name": "metadata_signatures", "version": "0.2.0"},
         },
-        "fusion": {
-            "strategy": "max",
-            "thresholds": DEFAULT_THRESHOLDS
-        }
+        "fusion": fusion_config()
     }
 
 # ---------- Analyze pipeline ----------
@@ -183,78 +222,144 @@ class AnalyzeOptions(BaseModel):
     check_watermarks: bool = True
     check_audio: bool = True
     check_visual: bool = True
+    watermark_region: str | None = Field(None, pattern="^(full|edges)$")
+    fusion_strategy: str | None = Field(None, pattern="^(max|cascade)$")
+    trace: bool = False
     face_watchlist: list[str] | None = None
     voice_watchlist: list[str] | None = None
     callback_url: str | None = None
 
+def _neural_stages(modality: str, opts: AnalyzeOptions) -> list[str]:
+    stages = []
+    if modality == "image" and opts.check_visual:
+        stages.append("image_gen")
+    if modality == "video" and opts.check_visual:
+        stages.append("video_deepfake")
+    if modality in ("video", "audio") and opts.check_audio:
+        stages.append("audio_spoof")
+    return stages
+
+@contextmanager
+def _stage(name: str, spans: list | None = None):
+    with timed("powerai_stage_seconds", stage=name), span(spans, name) as notes:
+        yield notes
+
 async def _pipeline(job_id: str, modality: str, file_path: str, opts: AnalyzeOptions):
-    result = {
-        "job_id": job_id,
-        "status": "running",
-        "modality": modality,
-        "provenance": {},
-        "watermarks": [],
-        "video_deepfake": {},
-        "image_gen": {},
-        "audio_spoof": {},
-        "identity": {"face_matches": [], "voice_matches": []},
-        "artifacts": {"metadata_flags": [], "hashes": {}},
-        "model_versions": {"vision": "v0", "audio": "v0", "provenance": "v0"},
-        "limitations": []
-    }
+    gauge_add("powerai_jobs_queued", -1)
+    outcome = "failed"
+    try:
+        with in_flight("powerai_jobs_in_flight"):
+            await _run_pipeline(job_id, modality, file_path, opts)
+        outcome = "completed"
+    except Exception as e:
+        # pollers see the failure; the scheduler logs the traceback
+        set_job(job_id, {"job_id": job_id, "modality": modality, "status": "failed", "error": str(e)})
+        raise
+    finally:
+        inc("powerai_jobs_total", modality=modality, outcome=outcome)
+
+async def _run_pipeline(job_id: str, modality: str, file_path: str, opts: AnalyzeOptions):
+    result = JobResult(job_id=job_id, modality=modality)
+    spans = None
+    if opts.trace:
+        spans = result.trace = []
     set_job(job_id, result)
 
     if opts.check_provenance:
-        result["provenance"] = check_c2pa(file_path)
-        if not result["provenance"].get("c2pa_present"):
-            result["limitations"].append("no_c2pa_credentials_found")
+        with _stage("provenance", spans) as notes:
+            result.provenance = check_c2pa(file_path)
+            # container headers are a few bytes each; the manifest store is what gets read
+            store = result.provenance["details"].get("manifest_store") or {}
+            notes["bytes_mapped"] = sum(seg["length"] for seg in store.get("segments", []))
+        if not result.provenance.get("c2pa_present"):
+            result.limitations.append("no_c2pa_credentials_found")
     if opts.check_watermarks:
-        result["watermarks"] = scan_watermarks(file_path, modality)
-
-    if modality == "image" and opts.check_visual:
-        result["image_gen"] = analyze_image(file_path)
-        result["image_gen"]["nn_score"] = pseudo_image_score(file_path)
-    if modality == "video":
-        if opts.check_visual:
-            result["video_deepfake"] = analyze_video(file_path)
-            result["video_deepfake"]["nn_score"] = pseudo_video_score(file_path)
-        if opts.check_audio:
-            result["audio_spoof"] = analyze_audio(file_path)
-    if modality == "audio" and opts.check_audio:
-        result["audio_spoof"] = analyze_audio(file_path)
-        result["audio_spoof"]["nn_score"] = pseudo_audio_score(file_path)
+        with _stage("watermark", spans) as notes:
+            result.watermarks = scan_watermarks(file_path, modality, region=opts.watermark_region)
+            notes["bytes_mapped"] = scanned_bytes(os.path.getsize(file_path), modality, opts.watermark_region)
+        result.artifacts["metadata_flags"] = metadata_flags(result.watermarks)
+
+    # Cascade: skip the neural stages when cheap evidence already decides
+    strategy = opts.fusion_strategy or FUSION_STRATEGY
+    neural = _neural_stages(modality, opts)
+    decided, cache_key = None, None
+    if strategy == "cascade":
+        decided = cheap_verdict(result.parts())
+        if decided is None and neural:
+            # keyed by a header/trailer sample; the full sha256 only runs to
+            # confirm a hit or, after the neural stages, to store a verdict
+            with _stage("hash_cache", spans):
+                cache_key = (sample_digest(file_path), modality, opts.check_visual, opts.check_audio)
+                cached = hash_lookup(cache_key)
+                if cached is not None:
+                    digest = file_digest(file_path)
+                    result.artifacts["hashes"]["sha256"] = digest
+                    if digest == cached["sha256"]:
+                        decided = {**cached, "decided_by": "hash_cache"}
+    result.skipped_stages = neural if decided else []
+
+    if not decided:
+        if "image_gen" in neural:
+            with _stage("image_gen", spans):
+                result.image_gen = analyze_image(file_path)
+                result.image_gen["nn_score"] = pseudo_image_score(file_path)
+        if "video_deepfake" in neural:
+            with _stage("video_deepfake", spans):
+                result.video_deepfake = analyze_video(file_path)
+                result.video_deepfake["nn_score"] = pseudo_video_score(file_path)
+        if "audio_spoof" in neural:
+            with _stage("audio_spoof", spans):
+                result.audio_spoof = analyze_audio(file_path)
+                if modality == "audio":
+                    result.audio_spoof["nn_score"] = pseudo_audio_score(file_path)
 
     # Optional identity sidecar vectors
     sidecar = file_path + ".vector.json"
     if os.path.exists(sidecar):
         try:
-            data = json.load(open(sidecar))
-            face_vec = data.get("face_vector")
-            voice_vec = data.get("voice_vector")
-            if face_vec:
-                result["identity"]["face_matches"] = match_face(face_vec, opts.face_watchlist)
-            if voice_vec:
-                result["identity"]["voice_matches"] = match_voice(voice_vec, opts.voice_watchlist)
+            with _stage("identity", spans):
+                data = json.load(open(sidecar))
+                face_vec = data.get("face_vector")
+                voice_vec = data.get("voice_vector")
+                if face_vec:
+                    result.identity["face_matches"] = match_face(face_vec, opts.face_watchlist)
+                if voice_vec:
+                    result.identity["voice_matches"] = match_voice(voice_vec, opts.voice_watchlist)
         except Exception:
-            result["limitations"].append("invalid_sidecar_vector")
-
-    fused = fuse(modality, result)
-    result.update(fused)
-    result["status"] = "completed"
-    set_job(job_id, result)
+            result.limitations.append("invalid_sidecar_vector")
+
+    with _stage("fuse", spans):
+        fused = fuse(modality, result.parts(), decided)
+    result.final_score = fused["final_score"]
+    result.label = fused["label"]
+    result.thresholds = fused["thresholds"]
+    result.decided_by = fused.get("decided_by")
+    if cache_key is not None and not decided:
+        digest = result.artifacts["hashes"].get("sha256") or file_digest(file_path)
+        result.artifacts["hashes"]["sha256"] = digest
+        hash_store(cache_key, {"final_score": fused["final_score"], "label": fused["label"], "sha256": digest})
+    result.status = "completed"
+    # encoded once: serves polls, the webhook body and its signature
+    body = result.encode()
+    set_job_encoded(job_id, body)
 
     if opts.callback_url:
         try:
-            await post_webhook(opts.callback_url, result)
+            with span(spans, "webhook"):
+                await post_webhook(opts.callback_url, body)
         except Exception:
             # don't fail the job if webhook delivery fails
             pass
+        if spans is not None:
+            # traced jobs re-encode so the stored trace includes the webhook span
+            set_job_encoded(job_id, result.encode())
 
 def _save_temp_upload(upload: UploadFile) -> str:
     suffix = os.path.splitext(upload.filename or "")[1] or ""
-    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
-    with os.fdopen(fd, "wb") as f:
-        f.write(upload.file.read())
+    with timed("powerai_upload_save_seconds", phase="spool"):
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "wb") as f:
+            f.write(upload.file.read())
     return tmp_path
 
 class EnrollRequest(BaseModel):
@@ -279,7 +384,6 @@ def delete_profile(profile_id: str, auth_ctx = Depends(require_auth_or_api_key))
 
 @app.post("/v1/images:analyze", status_code=202)
 async def analyze_image_endpoint(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     options: str | None = None,
     auth_ctx = Depends(require_auth_or_api_key)
@@ -291,16 +395,18 @@ async def analyze_image_endpoint(
         opts = AnalyzeOptions.model_validate_json(options or "{}")
     except Exception as e:
         raise HTTPException(400, f"Invalid options JSON: {e}")
+    plan = plan_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    admit_job(api_key, plan)
     tmp = _save_temp_upload(file)
     _, stored_path = save_upload(tmp, file.filename or "image")
     job_id = f"job_{uuid.uuid4().hex[:8]}"
     set_job(job_id, {"status": "queued"})
-    background_tasks.add_task(_pipeline, job_id, "image", stored_path, opts)
+    gauge_add("powerai_jobs_queued", 1)
+    SCHEDULER.submit(api_key, plan, job_cost("image"), _pipeline, job_id, "image", stored_path, opts)
     return {"job_id": job_id, "status": "queued"}
 
 @app.post("/v1/audio:analyze", status_code=202)
 async def analyze_audio_endpoint(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     options: str | None = None,
     auth_ctx = Depends(require_auth_or_api_key)
@@ -312,16 +418,18 @@ async def analyze_audio_endpoint(
         opts = AnalyzeOptions.model_validate_json(options or "{}")
     except Exception as e:
         raise HTTPException(400, f"Invalid options JSON: {e}")
+    plan = plan_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    admit_job(api_key, plan)
     tmp = _save_temp_upload(file)
     _, stored_path = save_upload(tmp, file.filename or "audio")
     job_id = f"job_{uuid.uuid4().hex[:8]}"
     set_job(job_id, {"status": "queued"})
-    background_tasks.add_task(_pipeline, job_id, "audio", stored_path, opts)
+    gauge_add("powerai_jobs_queued", 1)
+    SCHEDULER.submit(api_key, plan, job_cost("audio"), _pipeline, job_id, "audio", stored_path, opts)
     return {"job_id": job_id, "status": "queued"}
 
 @app.post("/v1/videos:analyze", status_code=202)
 async def analyze_video_endpoint(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     options: str | None = None,
     auth_ctx = Depends(require_auth_or_api_key)
@@ -333,23 +441,235 @@ async def analyze_video_endpoint(
         opts = AnalyzeOptions.model_validate_json(options or "{}")
     except Exception as e:
         raise HTTPException(400, f"Invalid options JSON: {e}")
+    plan = plan_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    admit_job(api_key, plan)
     tmp = _save_temp_upload(file)
     _, stored_path = save_upload(tmp, file.filename or "video")
     job_id = f"job_{uuid.uuid4().hex[:8]}"
     set_job(job_id, {"status": "queued"})
-    background_tasks.add_task(_pipeline, job_id, "video", stored_path, opts)
+    gauge_add("powerai_jobs_queued", 1)
+    SCHEDULER.submit(api_key, plan, job_cost("video"), _pipeline, job_id, "video", stored_path, opts)
     return {"job_id": job_id, "status": "queued"}
 
 @app.get("/v1/jobs/{job_id}")
-def get_job_status(job_id: str, auth_ctx = Depends(require_auth_or_api_key)):
+def get_job_status(job_id: str, trace: bool = False, auth_ctx = Depends(require_auth_or_api_key)):
     api_key = active_api_key_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
     enforce_bucket(api_key)
 
+    # finished jobs are served straight from their stored encoding
+    body = get_job_encoded(job_id)
+    if body is not None and (trace or b'"trace":' not in body):
+        return Response(body, media_type="application/json")
+
     job = get_job(job_id)
     if "error" in job:
         raise HTTPException(404, "Job not found")
+    if not trace and "trace" in job:
+        return {k: v for k, v in job.items() if k != "trace"}
     return job
 
+# ---------- Batch analyze ----------
+_batch_lock = threading.Lock()
+
+async def _run_batch_child(batch_id: str, job_id: str, modality: str, stored_path: str, opts: AnalyzeOptions):
+    # children run without per-item callbacks; one webhook is sent for the batch.
+    # A failed child is recorded by _pipeline and still counts as finished.
+    with _batch_lock:
+        move_count(get_job(batch_id), "queued", "running")
+    outcome = "failed"
+    try:
+        await _pipeline(job_id, modality, stored_path, opts.model_copy(update={"callback_url": None}))
+        outcome = "completed"
+    finally:
+        with _batch_lock:
+            batch = get_job(batch_id)
+            move_count(batch, "running", outcome)
+            batch["remaining"] -= 1
+            last = batch["remaining"] == 0
+        if last and opts.callback_url:
+            try:
+                await post_webhook(opts.callback_url, _batch_record(batch_id))
+            except Exception:
+                pass
+
+def _batch_record(batch_id: str) -> dict:
+    with _batch_lock:
+        return batch_status(get_job(batch_id))
+
+def _cleanup(paths: list[str]) -> None:
+    for p in paths:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+@app.post("/v1/batches:analyze", status_code=202)
+async def analyze_batch_endpoint(
+    files: list[UploadFile] | None = File(None),
+    archive: UploadFile | None = File(None),
+    options: str | None = None,
+    auth_ctx = Depends(require_auth_or_api_key)
+):
+    """
+    Submits many files in one request, either as repeated `files` parts or as
+    a single zip/tar `archive`. Modality is detected per item and the token
+    bucket is charged once with the weighted cost of the whole batch.
+    """
+    api_key = active_api_key_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    try:
+        opts = AnalyzeOptions.model_validate_json(options or "{}")
+    except Exception as e:
+        raise HTTPException(400, f"Invalid options JSON: {e}")
+    if not files and not archive:
+        raise HTTPException(400, "Provide `files` or an `archive`.")
+
+    # Admission and a token pre-check run before anything is extracted: items
+    # beyond what the key can currently pay for (at the cheapest modality) are
+    # never spooled. The actual weighted cost is charged once items are known.
+    plan = plan_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    admit_job(api_key, plan, slo=BATCH_SLO_SECONDS)
+    with timed("powerai_rate_limit_seconds"):
+        tokens = available(api_key, BUCKET_CAPACITY, BUCKET_REFILL_RATE)
+    unit = BATCH_COST_FACTOR * min(MODALITY_COST.values())
+    max_items = min(BATCH_MAX_ITEMS, int(tokens / unit)) if unit > 0 else BATCH_MAX_ITEMS
+    if max_items < 1:
+        inc("powerai_rate_limited_total")
+        raise HTTPException(429, {"error": "rate_limited", "tokens_remaining": tokens})
+
+    # (name, tmp_path) for every submitted item
+    staged: list[tuple[str, str]] = []
+    try:
+        for upload in files or []:
+            if len(staged) >= max_items:
+                raise ValueError(f"batch has more than {max_items} items")
+            staged.append((upload.filename or "item", _save_temp_upload(upload)))
+        if archive:
+            for name, tmp in iter_archive(archive.file, max_items - len(staged)):
+                staged.append((name, tmp))
+    except ValueError as e:
+        _cleanup([tmp for _, tmp in staged])
+        if max_items < BATCH_MAX_ITEMS and len(staged) >= max_items:
+            inc("powerai_rate_limited_total")
+            raise HTTPException(429, {"error": "rate_limited", "tokens_remaining": tokens})
+        raise HTTPException(400, str(e))
+
+    accepted, rejected = [], []
+    for name, tmp in staged:
+        modality = detect_modality(tmp, name)
+        if modality:
+            accepted.append((name, tmp, modality))
+        else:
+            rejected.append({"filename": name, "error": "unsupported_media_type"})
+
+    cost = batch_cost([m for _, _, m in accepted])
+    if cost > BUCKET_CAPACITY:
+        _cleanup([tmp for _, tmp in staged])
+        raise HTTPException(413, {"error": "batch_too_large", "cost": cost, "capacity": BUCKET_CAPACITY})
+    try:
+        # the pre-check above only covered one job; admit the whole batch now
+        admit_job(api_key, plan, slo=BATCH_SLO_SECONDS, cost=sum(job_cost(m) for _, _, m in accepted))
+        enforce_bucket(api_key, cost=cost)
+    except HTTPException:
+        _cleanup([tmp for _, tmp in staged])
+        raise
+
+    batch_id = f"batch_{uuid.uuid4().hex[:8]}"
+    items, children = [], []
+    for name, tmp, modality in accepted:
+        _, stored_path = save_upload(tmp, name)
+        job_id = f"job_{uuid.uuid4().hex[:8]}"
+        set_job(job_id, {"job_id": job_id, "status": "queued", "batch_id": batch_id})
+        gauge_add("powerai_jobs_queued", 1)
+        items.append({"job_id": job_id, "filename": name, "modality": modality})
+        children.append((job_id, modality, stored_path))
+    _cleanup([tmp for _, tmp in staged])
+
+    set_job(batch_id, {
+        "batch_id": batch_id,
+        "type": "batch",
+        "total": len(items),
+        "cost": cost,
+        "items": items,
+        "rejected": rejected,
+        "remaining": len(items),
+        "counts": {"queued": len(items)} if items else {},
+    })
+    for job_id, modality, stored_path in children:
+        SCHEDULER.submit(api_key, plan, job_cost(modality), _run_batch_child,
+                         batch_id, job_id, modality, stored_path, opts)
+    return {"batch_id": batch_id, "status": "queued", "total": len(items), "cost": cost, "rejected": rejected}
+
+@app.get("/v1/batches/{batch_id}")
+def get_batch_status(
+    batch_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    auth_ctx = Depends(require_auth_or_api_key)
+):
+    """Batch summary plus one page of child job results."""
+    api_key = active_api_key_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    enforce_bucket(api_key)
+
+    if get_job(batch_id).get("type") != "batch":
+        raise HTTPException(404, "Batch not found")
+    record = _batch_record(batch_id)
+    offset = max(0, offset)
+    limit = max(1, min(limit, 1000))
+    # only the requested page of children is decoded
+    page = record.pop("items")[offset:offset + limit]
+    record["results"] = [{**item, "result": get_job(item["job_id"])} for item in page]
+    record["offset"] = offset
+    record["next_offset"] = offset + limit if offset + limit < record["total"] else None
+    return record
+
+@app.get("/v1/batches/{batch_id}/results")
+def stream_batch_results(batch_id: str, auth_ctx = Depends(require_auth_or_api_key)):
+    """Streams every child job record as NDJSON, one line per item."""
+    api_key = active_api_key_for(auth_ctx.get("session_user"), auth_ctx.get("header_user"))
+    enforce_bucket(api_key)
+
+    batch = get_job(batch_id)
+    if batch.get("type") != "batch":
+        raise HTTPException(404, "Batch not found")
+
+    def lines():
+        for item in batch["items"]:
+            # splice finished results in from their stored encoding
+            body = get_job_encoded(item["job_id"]) or encode_json(get_job(item["job_id"]))
+            yield encode_json(item)[:-1] + b',"result":' + body + b"}\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# ---------- Admin: sampling profiler ----------
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(501, "Admin endpoints are not configured on this deployment.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(403, "Invalid admin token")
+
+@app.post("/admin/profile")
+def profile_worker(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    include_idle: bool = False,
+    _admin = Depends(require_admin)
+):
+    """
+    Samples the Python stacks of the worker that serves this request for
+    `seconds` and returns them in collapsed-stack format (flamegraph.pl input).
+    """
+    if not 0 < seconds <= 60 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(400, "seconds must be in (0, 60] and interval_ms in [1, 1000]")
+    try:
+        counts = profile_sample(seconds, interval_ms / 1000.0, include_idle)
+    except RuntimeError:
+        raise HTTPException(409, "A profile is already running on this worker")
+    filename = f"profile-{WORKER_ID.replace(':', '-')}-{int(time.time())}.folded"
+    return PlainTextResponse(collapsed(counts), headers={
+        "X-Worker-Id": WORKER_ID,
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    })
+
 # ---------- Stripe: create checkout + webhook ----------
 class CheckoutReq(BaseModel):
     price_id: Optional[str] = None
@@ -414,12 +734,23 @@ async def webhook_test(request: Request):
     return {"received": payload, "signature": sig, "length": len(body)}
 
 # ---------- SPA routes ----------
-@app.get("/", name="index", response_class=HTMLResponse)
-def index():
-    return spa_index()
+@app.api_route("/", methods=["GET", "HEAD"], name="index", response_class=HTMLResponse)
+def index(request: Request):
+    return spa_index(request)
+
+# HEAD too: CDNs and link checkers probe assets before fetching them
+@app.api_route("/assets/{asset_path:path}", methods=["GET", "HEAD"])
+def assets(asset_path: str, request: Request):
+    resp = STATIC.response(f"assets/{asset_path}", request.headers)
+    if resp is None:
+        return JSONResponse({"error": "Not Found"}, status_code=404)
+    return resp
 
 @app.get("/{full_path:path}", response_class=HTMLResponse)
-def spa_routes(full_path: str):
-    if full_path.startswith(("v1/", "assets/", "webhooks/", "billing/")):
+def spa_routes(full_path: str, request: Request):
+    if full_path.startswith(("v1/", "assets/", "webhooks/", "billing/", "admin/")):
         return JSONResponse({"error": "Not Found"}, status_code=404)
-    return spa_index()
+    # top-level files from web/public (favicon etc.) are copied into dist
+    if full_path and STATIC.has(full_path):
+        return STATIC.response(full_path, request.headers)
+    return spa_index(request)
@@ -0,0 +1,60 @@
+# tests/test_provenance.py — the C2PA container walker must never raise on
+# truncated or corrupted uploads; a bad store is reported as absent instead.
+import random, struct
+
+from detectors.provenance import check_c2pa
+
+def _box(typ: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + typ + payload
+
+def _jumd(kind: bytes, label: str) -> bytes:
+    # 16-byte type UUID, toggles (requestable + label present), label
+    return _box(b"jumd", kind + bytes(12) + b"\x03" + label.encode() + b"\x00")
+
+def _cbor_text(s: str) -> bytes:
+    return bytes([0x60 + len(s)]) + s.encode()
+
+def _store() -> bytes:
+    claim = _box(b"jumb", _jumd(b"c2cl", "c2pa.claim") + _box(
+        b"cbor", b"\xa1\x6fclaim_generator" + _cbor_text("Adobe Firefly")))
+    signature = _box(b"jumb", _jumd(b"c2cs", "c2pa.signature") + _box(b"cbor", b"\xa0"))
+    manifest = _box(b"jumb", _jumd(b"c2ma", "urn:uuid:test") + claim + signature)
+    return _box(b"jumb", _jumd(b"c2pa", "c2pa") + manifest)
+
+def _png_chunk(typ: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + typ + data + bytes(4)
+
+def _png() -> bytes:
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", bytes(13))
+            + _png_chunk(b"caBX", _store()) + _png_chunk(b"IEND", b""))
+
+def _jpeg() -> bytes:
+    packet = b"JP" + struct.pack(">HI", 1, 1) + _store()
+    return b"\xff\xd8" + b"\xff\xeb" + struct.pack(">H", 2 + len(packet)) + packet + b"\xff\xd9"
+
+def _check(tmp_path, data: bytes) -> dict:
+    path = tmp_path / "upload.bin"
+    path.write_bytes(data)
+    return check_c2pa(str(path))
+
+def test_png_and_jpeg_stores_are_found(tmp_path):
+    for data in (_png(), _jpeg()):
+        out = _check(tmp_path, data)
+        assert out["c2pa_present"] and out["valid_chain"]
+        assert out["details"]["claim_generator"] == "Adobe Firefly"
+
+def test_truncated_uploads_never_raise(tmp_path):
+    for data in (_png(), _jpeg()):
+        for cut in range(len(data)):
+            out = _check(tmp_path, data[:cut])
+            assert isinstance(out["c2pa_present"], bool)
+
+def test_corrupted_uploads_never_raise(tmp_path):
+    rng = random.Random(0)
+    for data in (_png(), _jpeg()):
+        for _ in range(500):
+            buf = bytearray(data)
+            for _ in range(rng.randint(1, 4)):
+                buf[rng.randrange(len(buf))] = rng.randrange(256)
+            out = _check(tmp_path, bytes(buf))
+            assert isinstance(out["c2pa_present"], bool)
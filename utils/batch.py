@@ -0,0 +1,166 @@
+# utils/batch.py
+import os, gzip, lzma, mimetypes, tarfile, tempfile, zipfile, zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Relative cost of one item per modality, used to charge the token bucket once
+# per batch instead of once per file
+MODALITY_COST = {"image": 1.0, "audio": 2.0, "video": 5.0}
+
+# Fraction of the per-item cost charged for batch items (batch submission skips
+# the per-request auth/parse/job overhead)
+BATCH_COST_FACTOR = float(os.environ.get("IP_BATCH_COST_FACTOR", "0.1"))
+BATCH_MAX_ITEMS = int(os.environ.get("IP_BATCH_MAX_ITEMS", "500"))
+# uncompressed size limits for archive members, checked while spooling so a
+# zip/tar bomb stops at the limit instead of filling the disk
+BATCH_MAX_MEMBER_BYTES = int(os.environ.get("IP_BATCH_MAX_MEMBER_BYTES", str(512 * 1024 * 1024)))
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get("IP_BATCH_MAX_TOTAL_BYTES", str(2 * 1024 * 1024 * 1024)))
+_CHUNK = 1024 * 1024
+
+# what a corrupt or truncated archive raises while being read
+_ARCHIVE_ERRORS = (
+    tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, gzip.BadGzipFile, lzma.LZMAError,
+    NotImplementedError,  # zip member with an unsupported compression method
+    RuntimeError,  # encrypted zip member
+)
+
+_BMFF_VIDEO_BRANDS = (b"isom", b"iso2", b"mp41", b"mp42", b"avc1", b"qt  ", b"M4V ", b"3gp4", b"3gp5", b"dash")
+_BMFF_IMAGE_BRANDS = (b"heic", b"heix", b"mif1", b"msf1", b"avif")
+_BMFF_AUDIO_BRANDS = (b"M4A ", b"M4B ")
+
+def detect_modality(path: str, name: str = "") -> Optional[str]:
+    """Sniffs the container magic, falling back to the file extension."""
+    with open(path, "rb") as f:
+        head = f.read(16)
+    if head[:3] == b"\xff\xd8\xff" or head[:8] == b"\x89PNG\r\n\x1a\n" or head[:4] == b"GIF8":
+        return "image"
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return "image"
+    if head[:4] == b"RIFF":
+        return {b"WEBP": "image", b"WAVE": "audio", b"AVI ": "video"}.get(head[8:12])
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in _BMFF_IMAGE_BRANDS:
+            return "image"
+        if brand in _BMFF_AUDIO_BRANDS:
+            return "audio"
+        if brand in _BMFF_VIDEO_BRANDS:
+            return "video"
+    if head[:4] == b"\x1aE\xdf\xa3":
+        return "video"
+    if head[:3] == b"ID3" or head[:4] in (b"fLaC", b"OggS") or (head[:1] == b"\xff" and len(head) > 1 and head[1] & 0xE0 == 0xE0):
+        return "audio"
+    mime, _ = mimetypes.guess_type(name)
+    if mime:
+        major = mime.split("/", 1)[0]
+        if major in MODALITY_COST:
+            return major
+    return None
+
+def batch_cost(modalities: List[str]) -> float:
+    return BATCH_COST_FACTOR * sum(MODALITY_COST.get(m, 1.0) for m in modalities)
+
+def _spool(src: BinaryIO, name: str, limit: int) -> Tuple[str, int]:
+    """Copies src to a temp file; the file is removed again if the copy fails."""
+    suffix = os.path.splitext(name)[1] or ""
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = src.read(_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > limit:
+                    raise ValueError(f"{name} exceeds the uncompressed size limit")
+                f.write(chunk)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return tmp_path, written
+
+def _skip_member(name: str) -> bool:
+    base = os.path.basename(name)
+    return not base or base.startswith(".") or name.startswith("__MACOSX/")
+
+def _zip_members(fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO, int]]:
+    with zipfile.ZipFile(fileobj) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or _skip_member(info.filename):
+                continue
+            with zf.open(info) as src:
+                yield info.filename, src, info.file_size
+
+def _tar_members(fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO, int]]:
+    try:
+        tf = tarfile.open(fileobj=fileobj, mode="r|*")
+    except tarfile.TarError:
+        raise ValueError("unsupported archive (expected zip or tar)")
+    with tf:
+        for member in tf:
+            if not member.isfile() or _skip_member(member.name):
+                continue
+            src = tf.extractfile(member)
+            if src is not None:
+                yield member.name, src, member.size
+
+def iter_archive(
+    fileobj: BinaryIO,
+    max_items: int = BATCH_MAX_ITEMS,
+    max_member_bytes: int = BATCH_MAX_MEMBER_BYTES,
+    max_total_bytes: int = BATCH_MAX_TOTAL_BYTES,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (member_name, tmp_path) for each regular file in a zip or tar
+    archive, spooling one member at a time. Tar archives are read as a stream.
+    Raises ValueError on unsupported or corrupt archives, when max_items is
+    exceeded or when a member or the whole archive inflates past its limit.
+    Paths already yielded belong to the caller; nothing else is left on disk.
+    """
+    fileobj.seek(0)
+    is_zip = zipfile.is_zipfile(fileobj)
+    fileobj.seek(0)
+    members = _zip_members(fileobj) if is_zip else _tar_members(fileobj)
+    count, total = 0, 0
+    try:
+        for name, src, declared in members:
+            count += 1
+            if count > max_items:
+                raise ValueError(f"archive has more than {max_items} items")
+            limit = min(max_member_bytes, max_total_bytes - total)
+            if declared > limit:
+                raise ValueError(f"{name} exceeds the uncompressed size limit")
+            tmp_path, size = _spool(src, name, limit)
+            total += size
+            yield name, tmp_path
+    except _ARCHIVE_ERRORS as e:
+        raise ValueError(f"corrupt archive: {e}") from e
+    finally:
+        members.close()
+
+def move_count(batch: Dict, src: str, dst: str) -> None:
+    """Moves one child from status src to dst in the batch's running counts."""
+    counts = batch["counts"]
+    counts[src] -= 1
+    if not counts[src]:
+        del counts[src]
+    counts[dst] = counts.get(dst, 0) + 1
+
+def batch_status(batch: Dict) -> Dict:
+    """
+    Batch record with its overall status, derived from the per-status child
+    counts kept on the record (children are never decoded for this).
+    """
+    counts = dict(batch["counts"])
+    total = batch["total"]
+    done = counts.get("completed", 0) + counts.get("failed", 0)
+    if total and done == total:
+        status = "completed"
+    elif done or counts.get("running"):
+        status = "running"
+    else:
+        status = "queued"
+    return {**batch, "status": status, "counts": counts}
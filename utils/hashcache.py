@@ -0,0 +1,48 @@
+# utils/hashcache.py
+import os, hashlib, threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from .metrics import inc
+
+# Per-process LRU of fused verdicts keyed by content digest, so re-submitted
+# bytes can be answered without running the detectors again
+CACHE_SIZE = int(os.environ.get("IP_HASH_CACHE_SIZE", "10000"))
+# bytes hashed from each end of the file for the cheap sample key
+SAMPLE_BYTES = 64 * 1024
+
+_CACHE: "OrderedDict[Tuple, Dict]" = OrderedDict()
+_lock = threading.Lock()
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def sample_digest(path: str) -> str:
+    """
+    sha256 of the size plus the first and last SAMPLE_BYTES: constant cost
+    regardless of file size. It is only a cache key; a hit is confirmed
+    against the full digest stored with the verdict.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha256(size.to_bytes(8, "big"))
+    with open(path, "rb") as f:
+        h.update(f.read(SAMPLE_BYTES))
+        if size > SAMPLE_BYTES:
+            f.seek(max(SAMPLE_BYTES, size - SAMPLE_BYTES))
+            h.update(f.read(SAMPLE_BYTES))
+    return h.hexdigest()
+
+def lookup(key: Tuple) -> Optional[Dict]:
+    with _lock:
+        hit = _CACHE.get(key)
+        if hit is not None:
+            _CACHE.move_to_end(key)
+    inc("powerai_hash_cache_total", result="hit" if hit is not None else "miss")
+    return hit
+
+def store(key: Tuple, verdict: Dict) -> None:
+    with _lock:
+        _CACHE[key] = verdict
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.popitem(last=False)
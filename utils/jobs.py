@@ -1,11 +1,36 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
 from datetime import datetime
+from .metrics import timed
+from .results import JobResult, decode_json
 
-JOBS: Dict[str, Dict[str, Any]] = {}
+# Values are plain dicts for queued/batch records, the live JobResult while a
+# job runs, and the encoded JSON bytes once it finished.
+JOBS: Dict[str, Union[Dict[str, Any], JobResult, bytes]] = {}
 
-def set_job(job_id: str, payload: Dict[str, Any]) -> None:
-    payload.setdefault("updated_at", datetime.utcnow().isoformat())
-    JOBS[job_id] = payload
+def set_job(job_id: str, payload: Union[Dict[str, Any], JobResult]) -> None:
+    with timed("powerai_job_store_seconds", op="set"):
+        if isinstance(payload, dict):
+            payload.setdefault("updated_at", datetime.utcnow().isoformat())
+        JOBS[job_id] = payload
+
+def set_job_encoded(job_id: str, body: bytes) -> None:
+    """Stores a finished result as its final JSON encoding."""
+    with timed("powerai_job_store_seconds", op="set"):
+        JOBS[job_id] = body
 
 def get_job(job_id: str) -> Dict[str, Any]:
-    return JOBS.get(job_id, {"error": "not_found"})
+    with timed("powerai_job_store_seconds", op="get"):
+        job = JOBS.get(job_id)
+        if job is None:
+            return {"error": "not_found"}
+        if isinstance(job, bytes):
+            return decode_json(job)
+        if isinstance(job, JobResult):
+            return job.to_dict()
+        return job
+
+def get_job_encoded(job_id: str) -> Optional[bytes]:
+    """The stored JSON bytes of a finished job, or None if it has none yet."""
+    with timed("powerai_job_store_seconds", op="get"):
+        job = JOBS.get(job_id)
+        return job if isinstance(job, bytes) else None
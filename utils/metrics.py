@@ -0,0 +1,232 @@
+# utils/metrics.py
+import os, json, time, glob, tempfile, threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Low-overhead process-local counters, gauges and latency histograms.
+# Counter and histogram updates are plain dict/list mutations without locks:
+# under contention from the threadpool an increment can very rarely be lost,
+# which is fine for monitoring and keeps the hot path at a few hundred
+# nanoseconds. Gauges go up and down from both the event loop and job threads,
+# where a lost update would drift forever, so they take a lock.
+#
+# A daemon thread in each uvicorn worker dumps its snapshot to IP_METRICS_DIR
+# every IP_METRICS_FLUSH_SECONDS, so updates never do file I/O; the /metrics
+# endpoint merges the snapshots of all live workers and renders the
+# Prometheus text exposition format.
+
+METRICS_DIR = os.environ.get("IP_METRICS_DIR", "data/metrics")
+FLUSH_INTERVAL = float(os.environ.get("IP_METRICS_FLUSH_SECONDS", "1.0"))
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_gauges: Dict[str, Dict[LabelKey, float]] = {}
+_histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+_buckets: Dict[str, Tuple[float, ...]] = {}
+_help: Dict[str, str] = {}
+_gauge_lock = threading.Lock()
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ()
+
+def describe(name: str, text: str, buckets: Tuple[float, ...] = None) -> None:
+    _help[name] = text
+    if buckets:
+        _buckets[name] = tuple(buckets)
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    series = _counters.setdefault(name, {})
+    k = _key(labels)
+    series[k] = series.get(k, 0.0) + value
+
+def gauge_add(name: str, value: float, **labels) -> None:
+    k = _key(labels)
+    with _gauge_lock:
+        series = _gauges.setdefault(name, {})
+        series[k] = series.get(k, 0.0) + value
+
+def observe(name: str, value: float, **labels) -> None:
+    buckets = _buckets.get(name, DEFAULT_BUCKETS)
+    series = _histograms.setdefault(name, {})
+    k = _key(labels)
+    h = series.get(k)
+    if h is None:
+        # per-bucket counts (last slot is +Inf), then sum and count
+        h = series[k] = [0.0] * (len(buckets) + 3)
+    h[bisect_left(buckets, value)] += 1
+    h[-2] += value
+    h[-1] += 1
+
+@contextmanager
+def timed(name: str, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+@contextmanager
+def in_flight(name: str, **labels):
+    gauge_add(name, 1, **labels)
+    try:
+        yield
+    finally:
+        gauge_add(name, -1, **labels)
+
+# ---------- Cross-worker aggregation ----------
+def _copy(d: Dict[str, Dict]) -> Dict[str, List]:
+    # list(dict.items()) is a single C-level copy, so writers can't change the
+    # dict size underneath it; the outer comprehension only walks the copies
+    return {n: [[list(k), list(v) if isinstance(v, list) else v] for k, v in list(s.items())]
+            for n, s in list(d.items())}
+
+def snapshot() -> Dict:
+    while True:
+        try:
+            counters, gauges, histograms = _copy(_counters), _copy(_gauges), _copy(_histograms)
+            break
+        except RuntimeError:
+            # dict changed size during iteration (interpreters without a GIL)
+            continue
+    return {
+        "pid": os.getpid(),
+        "counters": counters,
+        "gauges": gauges,
+        "histograms": histograms,
+        "buckets": {n: list(b) for n, b in list(_buckets.items())},
+        "help": dict(_help),
+    }
+
+def flush() -> None:
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp, os.path.join(METRICS_DIR, f"{os.getpid()}.json"))
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            # keep flushing; a bad snapshot only costs one interval
+            pass
+
+def _start_flusher() -> None:
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _collect() -> List[Dict]:
+    flush()
+    snaps = []
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            pid = int(os.path.basename(path).split(".", 1)[0])
+        except ValueError:
+            continue
+        if pid != os.getpid() and not _alive(pid):
+            continue
+        try:
+            with open(path) as f:
+                snaps.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snaps
+
+def _merge(snaps: List[Dict]) -> Dict:
+    merged = {"counters": {}, "gauges": {}, "histograms": {}, "buckets": {}, "help": {}}
+    for snap in snaps:
+        merged["buckets"].update(snap.get("buckets", {}))
+        merged["help"].update(snap.get("help", {}))
+        for kind in ("counters", "gauges"):
+            for name, series in snap.get(kind, {}).items():
+                out = merged[kind].setdefault(name, {})
+                for labels, v in series:
+                    k = tuple(tuple(p) for p in labels)
+                    out[k] = out.get(k, 0.0) + v
+        for name, series in snap.get("histograms", {}).items():
+            out = merged["histograms"].setdefault(name, {})
+            for labels, h in series:
+                k = tuple(tuple(p) for p in labels)
+                if k in out and len(out[k]) == len(h):
+                    out[k] = [a + b for a, b in zip(out[k], h)]
+                else:
+                    out[k] = list(h)
+    return merged
+
+def _fmt_labels(k, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in k]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt_num(v: float) -> str:
+    return repr(int(v)) if float(v).is_integer() else repr(v)
+
+def render_prometheus() -> str:
+    """Prometheus text exposition (format 0.0.4) aggregated across workers."""
+    m = _merge(_collect())
+    lines = []
+    for kind, typ in (("counters", "counter"), ("gauges", "gauge")):
+        for name in sorted(m[kind]):
+            if name in m["help"]:
+                lines.append(f"# HELP {name} {m['help'][name]}")
+            lines.append(f"# TYPE {name} {typ}")
+            for k, v in sorted(m[kind][name].items()):
+                lines.append(f"{name}{_fmt_labels(k)} {_fmt_num(v)}")
+    for name in sorted(m["histograms"]):
+        buckets = m["buckets"].get(name, DEFAULT_BUCKETS)
+        if name in m["help"]:
+            lines.append(f"# HELP {name} {m['help'][name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for k, h in sorted(m["histograms"][name].items()):
+            cumulative = 0.0
+            for le, c in zip(list(buckets) + ["+Inf"], h[:-2]):
+                cumulative += c
+                lines.append(f'{name}_bucket{_fmt_labels(k, f"le={json.dumps(str(le))}")} {_fmt_num(cumulative)}')
+            lines.append(f"{name}_sum{_fmt_labels(k)} {_fmt_num(h[-2])}")
+            lines.append(f"{name}_count{_fmt_labels(k)} {_fmt_num(h[-1])}")
+    return "\n".join(lines) + "\n"
+
+describe("powerai_stage_seconds", "Wall time of each analyze pipeline stage")
+describe("powerai_rate_limit_seconds", "Time spent in the token-bucket check")
+describe("powerai_rate_limited_total", "Requests rejected by the token bucket")
+describe("powerai_auth_lookup_seconds", "API key lookup time")
+describe("powerai_upload_save_seconds", "Time to spool and store an upload")
+describe("powerai_upload_bytes_total", "Bytes of uploads stored")
+describe("powerai_webhook_seconds", "Webhook delivery time")
+describe("powerai_webhook_total", "Webhook deliveries by outcome")
+describe("powerai_job_store_seconds", "Job store operation time", buckets=(1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3))
+describe("powerai_jobs_queued", "Jobs accepted but not yet started")
+describe("powerai_jobs_in_flight", "Jobs currently running")
+describe("powerai_jobs_total", "Finished jobs by modality and outcome")
+describe("powerai_hash_cache_total", "Verdict cache lookups by result")
+describe("powerai_sched_queue_depth", "Jobs waiting in the fair scheduler")
+describe("powerai_sched_wait_seconds", "Time jobs spent queued in the scheduler", buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600))
+describe("powerai_sched_rejected_total", "Jobs rejected by scheduler admission control")
+describe("powerai_sched_errors_total", "Scheduled jobs that raised")
+
+_start_flusher()
+# workers forked after import (gunicorn --preload) need their own flusher
+os.register_at_fork(after_in_child=_start_flusher)
@@ -0,0 +1,63 @@
+# utils/profiler.py
+import os, sys, threading, time
+from collections import Counter
+from typing import Dict
+
+# Sampling profiler for a live worker. A sampler thread snapshots every other
+# thread's Python stack at a fixed interval and aggregates them in the
+# collapsed-stack format consumed by flamegraph.pl / speedscope.
+
+MAX_SECONDS = 60.0
+# leaf frames of threads parked in the event loop selector or a pool queue
+IDLE_LEAVES = {"select", "poll", "wait", "_wait_for_tstate_lock"}
+# (file, function) leaves that block in C: an idle executor thread sits in
+# SimpleQueue.get() directly under _worker, queue.Queue waiters under get,
+# and the metrics flusher sleeps in its loop
+IDLE_FRAMES = {("thread.py", "_worker"), ("queue.py", "get"), ("metrics.py", "_flush_loop")}
+
+_busy = threading.Lock()
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _idle(frame) -> bool:
+    code = frame.f_code
+    if code.co_name in IDLE_LEAVES:
+        return True
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+def sample(seconds: float, interval: float = 0.005, include_idle: bool = False) -> Dict[str, int]:
+    """
+    Samples all threads except the caller for `seconds` and returns
+    {collapsed_stack: samples}. Raises RuntimeError if a profile is already
+    running in this process.
+    """
+    if not _busy.acquire(blocking=False):
+        raise RuntimeError("profiler_busy")
+    try:
+        me = threading.get_ident()
+        names = {}
+        counts: Counter = Counter()
+        deadline = time.monotonic() + min(seconds, MAX_SECONDS)
+        while time.monotonic() < deadline:
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if not include_idle and _idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(tid, f"thread-{tid}"))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return dict(counts)
+    finally:
+        _busy.release()
+
+def collapsed(counts: Dict[str, int]) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items(), key=lambda kv: -kv[1]))
@@ -0,0 +1,81 @@
+# utils/results.py
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+# Compact job result model. Finished results are encoded to JSON exactly once;
+# the same bytes serve every poll, the webhook body and its HMAC signature.
+
+def encode_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def decode_json(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def _identity() -> Dict[str, List]:
+    return {"face_matches": [], "voice_matches": []}
+
+def _artifacts() -> Dict[str, Any]:
+    return {"metadata_flags": [], "hashes": {}}
+
+def _model_versions() -> Dict[str, str]:
+    return {"vision": "v0", "audio": "v0", "provenance": "v0"}
+
+@dataclass(slots=True)
+class JobResult:
+    job_id: str
+    modality: str
+    status: str = "running"
+    provenance: Dict = field(default_factory=dict)
+    watermarks: List[Dict] = field(default_factory=list)
+    video_deepfake: Dict = field(default_factory=dict)
+    image_gen: Dict = field(default_factory=dict)
+    audio_spoof: Dict = field(default_factory=dict)
+    identity: Dict = field(default_factory=_identity)
+    artifacts: Dict = field(default_factory=_artifacts)
+    model_versions: Dict = field(default_factory=_model_versions)
+    limitations: List[str] = field(default_factory=list)
+    skipped_stages: List[str] = field(default_factory=list)
+    final_score: Optional[float] = None
+    label: Optional[str] = None
+    thresholds: Optional[Dict] = None
+    decided_by: Optional[str] = None
+    trace: Optional[List[Dict]] = None
+    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    # unset optional keys are left out of the payload rather than sent as null
+    _OPTIONAL = ("final_score", "label", "thresholds", "decided_by", "trace")
+
+    def parts(self) -> Dict[str, Any]:
+        """Detector outputs in the dict shape utils.scoring consumes."""
+        return {
+            "provenance": self.provenance,
+            "watermarks": self.watermarks,
+            "image_gen": self.image_gen,
+            "video_deepfake": self.video_deepfake,
+            "audio_spoof": self.audio_spoof,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        # shallow on purpose: nested values are already plain JSON types
+        out = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is None and name in self._OPTIONAL:
+                continue
+            out[name] = value
+        return out
+
+    def encode(self) -> bytes:
+        self.updated_at = datetime.utcnow().isoformat()
+        return encode_json(self.to_dict())
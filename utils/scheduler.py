@@ -0,0 +1,190 @@
+# utils/scheduler.py
+import asyncio, logging, math, os, time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from .batch import MODALITY_COST
+from .metrics import gauge_add, observe, inc
+
+# Plan-aware weighted fair queueing of analysis jobs. Every tenant (API key)
+# has its own queue; jobs get a virtual finish tag of cost / plan weight
+# (self-clocked fair queueing), and the scheduler always starts the eligible
+# head with the smallest tag. Per-tenant concurrency caps keep one tenant from
+# occupying every worker, and admission control rejects work whose estimated
+# queue wait would exceed the plan's SLO.
+
+WORKERS = int(os.environ.get("IP_SCHED_WORKERS", "4"))
+
+# "anon" is the single tenant all unauthenticated clients share when auth is
+# not required; it weighs like free but may use every worker, since capping it
+# at one job would serialize all anonymous traffic
+PLAN_WEIGHTS = {"free": 1.0, "pro": 4.0, "anon": 1.0}
+PLAN_MAX_CONCURRENCY = {"free": 1, "pro": 4, "anon": WORKERS}
+PLAN_SLO_SECONDS = {"free": 300.0, "pro": 60.0, "anon": 300.0}
+
+# initial estimate of seconds per unit of modality cost; refined from completed jobs
+UNIT_SECONDS = float(os.environ.get("IP_SCHED_UNIT_SECONDS", "0.5"))
+BATCH_SLO_SECONDS = float(os.environ.get("IP_SCHED_BATCH_SLO_SECONDS", "3600"))
+EWMA_ALPHA = 0.1
+
+log = logging.getLogger(__name__)
+
+def job_cost(modality: str) -> float:
+    return MODALITY_COST.get(modality, 1.0)
+
+class _Tenant:
+    __slots__ = ("plan", "queue", "queued_cost", "running", "last_tag")
+
+    def __init__(self, plan: str):
+        self.plan = plan
+        self.queue: Deque[Tuple[float, float, Any]] = deque()  # (tag, cost, item)
+        self.queued_cost = 0.0
+        self.running = 0
+        self.last_tag = 0.0
+
+class FairQueue:
+    """
+    Scheduling policy without any I/O, driven by an explicit clock so it can
+    be simulated. policy="fifo" disables weights and caps (arrival order),
+    which is how BackgroundTasks behaved.
+    """
+
+    def __init__(self, workers: int = WORKERS, unit_seconds: float = UNIT_SECONDS, policy: str = "wfq"):
+        self.workers = workers
+        self.unit_seconds = unit_seconds
+        self.policy = policy
+        self.tenants: Dict[str, _Tenant] = {}
+        self.running = 0
+        self.vtime = 0.0
+        self._seq = 0
+
+    def _weight(self, plan: str) -> float:
+        return PLAN_WEIGHTS.get(plan, PLAN_WEIGHTS["free"])
+
+    def _cap(self, plan: str) -> int:
+        if self.policy == "fifo":
+            return self.workers
+        return PLAN_MAX_CONCURRENCY.get(plan, PLAN_MAX_CONCURRENCY["free"])
+
+    def estimate_wait(self, tenant: str, plan: str, cost: float = 1.0) -> float:
+        """
+        Seconds until new work of `cost` units from tenant would be running,
+        under current load. A single job costs 1; for a batch, pass the summed
+        job_cost of its items so the estimate covers its last item.
+        """
+        t = self.tenants.get(tenant)
+        # the submission's own items beyond the first queue behind each other
+        extra = max(0.0, cost - 1.0)
+        ahead = (t.queued_cost if t else 0.0) + extra
+        if self.policy == "fifo":
+            ahead = sum(x.queued_cost for x in self.tenants.values()) + extra
+            if self.running < self.workers and not ahead:
+                return 0.0
+            return ahead * self.unit_seconds / self.workers
+        running = t.running if t else 0
+        if not ahead and running < self._cap(plan) and self.running < self.workers:
+            return 0.0
+        active = sum(self._weight(x.plan) for x in self.tenants.values() if x.queue or x.running)
+        if not t or not (t.queue or t.running):
+            active += self._weight(plan)
+        share = self.workers * self._weight(plan) / active
+        rate = min(share, self._cap(plan)) / self.unit_seconds  # cost units per second
+        # the slot we wait for frees up after about one job's service time
+        return (ahead + 1.0) / rate
+
+    def admit(self, tenant: str, plan: str, slo: Optional[float] = None, cost: float = 1.0) -> Tuple[bool, float, float]:
+        """Returns (ok, retry_after_seconds, estimated_wait)."""
+        slo = PLAN_SLO_SECONDS.get(plan, PLAN_SLO_SECONDS["free"]) if slo is None else slo
+        est = self.estimate_wait(tenant, plan, cost)
+        if est <= slo:
+            return True, 0.0, est
+        return False, max(1.0, math.ceil(est - slo)), est
+
+    def push(self, tenant: str, plan: str, cost: float, item: Any) -> None:
+        t = self.tenants.get(tenant)
+        if t is None:
+            t = self.tenants[tenant] = _Tenant(plan)
+        t.plan = plan
+        if self.policy == "fifo":
+            self._seq += 1
+            tag = float(self._seq)
+        else:
+            tag = max(self.vtime, t.last_tag) + cost / self._weight(plan)
+        t.last_tag = tag
+        t.queue.append((tag, cost, item))
+        t.queued_cost += cost
+
+    def pop(self) -> Optional[Tuple[str, float, Any]]:
+        """Starts the eligible job with the smallest finish tag, if a worker is free."""
+        if self.running >= self.workers:
+            return None
+        best, best_tag = None, None
+        for name, t in self.tenants.items():
+            if t.queue and t.running < self._cap(t.plan) and (best_tag is None or t.queue[0][0] < best_tag):
+                best, best_tag = name, t.queue[0][0]
+        if best is None:
+            return None
+        t = self.tenants[best]
+        tag, cost, item = t.queue.popleft()
+        t.queued_cost -= cost
+        t.running += 1
+        self.running += 1
+        self.vtime = max(self.vtime, tag)
+        return best, cost, item
+
+    def done(self, tenant: str, cost: float, seconds: float) -> None:
+        t = self.tenants[tenant]
+        t.running -= 1
+        self.running -= 1
+        if cost > 0:
+            self.unit_seconds += EWMA_ALPHA * (seconds / cost - self.unit_seconds)
+        if not t.queue and not t.running:
+            del self.tenants[tenant]
+
+    def depth(self) -> int:
+        return sum(len(t.queue) for t in self.tenants.values())
+
+class Scheduler(FairQueue):
+    """
+    Runs queued coroutine functions on the event loop's default executor, at
+    most `workers` at a time, in weighted-fair order.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tasks = set()
+
+    def submit(self, tenant: str, plan: str, cost: float, fn: Callable, *args) -> None:
+        self.push(tenant, plan, cost, (fn, args, time.monotonic()))
+        gauge_add("powerai_sched_queue_depth", 1)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            nxt = self.pop()
+            if nxt is None:
+                return
+            gauge_add("powerai_sched_queue_depth", -1)
+            task = loop.create_task(self._run(*nxt))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, tenant: str, cost: float, item) -> None:
+        fn, args, queued_at = item
+        plan = self.tenants[tenant].plan
+        observe("powerai_sched_wait_seconds", time.monotonic() - queued_at, plan=plan)
+        t0 = time.monotonic()
+        try:
+            # jobs do blocking file/CPU work, so each gets its own thread + loop
+            await asyncio.to_thread(asyncio.run, fn(*args))
+        except Exception:
+            # the job function records its own failed status; this is the
+            # only place the traceback surfaces
+            log.exception("scheduled job %s failed (tenant plan %s)", getattr(fn, "__name__", fn), plan)
+            inc("powerai_sched_errors_total")
+        finally:
+            self.done(tenant, cost, time.monotonic() - t0)
+            self._dispatch()
+
+SCHEDULER = Scheduler()
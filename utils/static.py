@@ -0,0 +1,193 @@
+# utils/static.py
+import os, re, gzip, json, hashlib, mimetypes, threading, time
+from typing import Dict, Optional, Set, Tuple
+
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # brotli variants are optional
+    brotli = None
+
+# In-memory SPA shell + asset cache. Files under the Vite dist dir are loaded
+# on first hit, precompressed once (gzip, and brotli when installed) and served
+# with strong ETags. The dist dir is re-checked at most every RELOAD_SECONDS
+# and reloaded when a rebuild changed it.
+
+RELOAD_SECONDS = float(os.environ.get("IP_STATIC_RELOAD_SECONDS", "2"))
+MAX_CACHED_BYTES = int(os.environ.get("IP_STATIC_MAX_BYTES", str(16 * 1024 * 1024)))
+MIN_COMPRESS_BYTES = 512
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+# Files listed in Vite's build manifest are content-hashed and cached as
+# immutable. Without a manifest, names ending in "-<8 char hash>.<ext>" count
+# as hashed when the segment mixes digits and letters or upper and lower case
+# (index-4f3a9c1b.js, index-BxY_12ab.css), so plain words such as
+# my-logotype.svg keep revalidating.
+MANIFESTS = (".vite/manifest.json", "manifest.json")
+HASHED_NAME = re.compile(r"-([A-Za-z0-9_-]{8})\.[A-Za-z0-9]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+class _Entry:
+    __slots__ = ("media_type", "etag", "variants", "cache_control")
+
+    def __init__(self, media_type: str, etag: str, variants: Dict[str, bytes], cache_control: str):
+        self.media_type = media_type
+        self.etag = etag
+        self.variants = variants  # encoding ("identity", "gzip", "br") -> body
+        self.cache_control = cache_control
+
+def _manifest_files(dist_dir: str) -> Optional[Set[str]]:
+    for name in MANIFESTS:
+        try:
+            with open(os.path.join(dist_dir, name)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        files = set()
+        for chunk in manifest.values():
+            if isinstance(chunk, dict):
+                files.add(chunk.get("file"))
+                files.update(chunk.get("css", []))
+                files.update(chunk.get("assets", []))
+        files.discard(None)
+        if files:  # a PWA web manifest has no chunk entries
+            return files
+    return None
+
+def _looks_hashed(rel: str) -> bool:
+    m = HASHED_NAME.search(rel)
+    if not m:
+        return False
+    seg = m.group(1)
+    has_digit = any(c.isdigit() for c in seg)
+    has_alpha = any(c.isalpha() for c in seg)
+    mixed_case = any(c.islower() for c in seg) and any(c.isupper() for c in seg)
+    return (has_digit and has_alpha) or mixed_case
+
+def _load_file(path: str, rel: str, immutable: bool) -> Optional[_Entry]:
+    if os.path.getsize(path) > MAX_CACHED_BYTES:
+        return None
+    with open(path, "rb") as f:
+        body = f.read()
+    media_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    variants = {"identity": body}
+    if len(body) >= MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE):
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            variants["gzip"] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body):
+                variants["br"] = br
+    etag = hashlib.sha256(body).hexdigest()[:20]
+    return _Entry(media_type, etag, variants, IMMUTABLE if immutable else REVALIDATE)
+
+def _accepted(header: str) -> Dict[str, float]:
+    prefs = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        m = re.search(r"q=([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        prefs[name.strip().lower()] = q
+    return prefs
+
+def _pick_encoding(entry: _Entry, accept_encoding: str) -> str:
+    prefs = _accepted(accept_encoding or "")
+    for enc in ("br", "gzip"):
+        if enc in entry.variants and prefs.get(enc, prefs.get("*", 0.0)) > 0:
+            return enc
+    return "identity"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # weak comparison as RFC 9110 requires for If-None-Match
+    return any(t.removeprefix("W/") == etag for t in tags)
+
+class StaticCache:
+    def __init__(self, dist_dir: str):
+        self.dist_dir = dist_dir
+        self._entries: Dict[str, _Entry] = {}
+        self._large: Dict[str, str] = {}  # rel -> path, served from disk
+        self._signature: Optional[Tuple] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _dist_signature(self) -> Optional[Tuple]:
+        # a rebuild rewrites index.html and replaces files in assets/
+        sig = []
+        for rel in ("", "assets", "index.html"):
+            try:
+                st = os.stat(os.path.join(self.dist_dir, rel))
+            except OSError:
+                sig.append(None)
+                continue
+            sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        return tuple(sig)
+
+    def _reload(self) -> None:
+        entries, large = {}, {}
+        hashed = _manifest_files(self.dist_dir)
+        for root, dirs, files in os.walk(self.dist_dir):
+            dirs[:] = [d for d in dirs if d != ".vite"]  # build metadata, not served
+            for name in files:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.dist_dir).replace(os.sep, "/")
+                if hashed is not None:
+                    immutable = rel in hashed
+                else:
+                    immutable = rel.startswith("assets/") and _looks_hashed(rel)
+                entry = _load_file(path, rel, immutable)
+                if entry is not None:
+                    entries[rel] = entry
+                else:
+                    large[rel] = path
+        self._entries, self._large = entries, large
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked < RELOAD_SECONDS:
+            return
+        with self._lock:
+            if self._signature is not None and now - self._checked < RELOAD_SECONDS:
+                return
+            sig = self._dist_signature()
+            if sig != self._signature:
+                self._reload()
+                self._signature = sig
+            self._checked = now
+
+    def has(self, rel: str) -> bool:
+        self._refresh()
+        return rel in self._entries or rel in self._large
+
+    def response(self, rel: str, headers) -> Optional[Response]:
+        """Builds the response for rel (a dist-relative path), or None if unknown."""
+        self._refresh()
+        entry = self._entries.get(rel)
+        if entry is None:
+            path = self._large.get(rel)
+            return FileResponse(path) if path else None
+        encoding = _pick_encoding(entry, headers.get("accept-encoding", ""))
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        etag = f'"{entry.etag}{suffix}"'
+        out_headers = {"ETag": etag, "Cache-Control": entry.cache_control, "Vary": "Accept-Encoding"}
+        if _etag_matches(headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=out_headers)
+        if encoding != "identity":
+            out_headers["Content-Encoding"] = encoding
+        return Response(entry.variants[encoding], media_type=entry.media_type, headers=out_headers)
@@ -1,5 +1,6 @@
 import os, uuid, shutil
 from typing import Tuple
+from .metrics import timed, inc
 
 STORAGE_DIR = os.environ.get("IP_STORAGE_DIR", "data/uploads")
 
@@ -8,5 +9,7 @@ def save_upload(tmp_path: str, original_name: str) -> Tuple[str, str]:
     ext = os.path.splitext(original_name)[1].lower()
     key = f"{uuid.uuid4().hex}{ext}"
     dest = os.path.join(STORAGE_DIR, key)
-    shutil.copyfile(tmp_path, dest)
+    with timed("powerai_upload_save_seconds", phase="store"):
+        shutil.copyfile(tmp_path, dest)
+    inc("powerai_upload_bytes_total", os.path.getsize(dest))
     return key, dest
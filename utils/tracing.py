@@ -0,0 +1,55 @@
+# utils/tracing.py
+import os, socket, time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+# Opt-in per-job span recording. Each span captures wall and thread CPU time
+# plus bytes read through read() syscalls by the current thread (Linux /proc
+# rchar, None elsewhere). Page faults on mmap'd files are not counted there,
+# so stages that scan the upload through mmap put the bytes they covered in
+# "bytes_mapped" via the dict the span yields.
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def _thread_rchar() -> Optional[int]:
+    try:
+        with open("/proc/thread-self/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"rchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+@contextmanager
+def _record(spans: List[Dict], name: str):
+    rchar0 = _thread_rchar()
+    cpu0 = time.thread_time()
+    wall0 = time.perf_counter()
+    start = time.time()
+    notes: Dict = {}
+    try:
+        yield notes
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.thread_time() - cpu0
+        rchar1 = _thread_rchar()
+        spans.append({
+            "stage": name,
+            "start": start,
+            "end": start + wall,
+            "duration_ms": 1000 * wall,
+            "cpu_ms": 1000 * cpu,
+            "bytes_read": rchar1 - rchar0 if rchar0 is not None and rchar1 is not None else None,
+            "bytes_mapped": notes.get("bytes_mapped"),
+            "worker": WORKER_ID,
+        })
+
+def span(spans: Optional[List[Dict]], name: str):
+    """
+    Records a span into spans; a no-op when tracing is off (spans is None).
+    Either way the context yields a dict for optional span fields.
+    """
+    if spans is None:
+        return nullcontext({})
+    return _record(spans, name)
@@ -27,6 +27,20 @@ def _refill(tokens: float, last_refill: int, capacity: float, refill_rate: float
     elapsed = max(0, _now() - last_refill)
     return min(capacity, tokens + elapsed * refill_rate)
 
+def available(api_key: str, capacity: float, refill_rate: float) -> float:
+    """Tokens api_key could spend right now, without taking any."""
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT tokens, last_refill, capacity, refill_rate FROM usage_buckets WHERE api_key=?", (api_key,))
+        row = cur.fetchone()
+        if row is None:
+            return capacity
+        tokens, last_refill, capacity_db, refill_rate_db = row
+        return _refill(tokens, last_refill, capacity_db or capacity, refill_rate_db or refill_rate)
+    finally:
+        conn.close()
+
 def take(api_key: str, cost: float, capacity: float, refill_rate: float) -> Tuple[bool, Dict]:
     conn = get_conn()
     try:
@@ -1,19 +1,30 @@
-import os, hmac, hashlib, httpx, json
-from typing import Dict
+import os, hmac, hashlib, httpx
+from typing import Dict, Union
+from .metrics import timed, inc
+from .results import encode_json
 
 SECRET = os.environ.get("IP_SECRET_KEY", "dev_secret")
 
-def sign_payload(payload: Dict) -> str:
-    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+def sign_body(body: bytes) -> str:
     mac = hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
     return f"sha256={mac}"
 
-async def post_webhook(url: str, payload: Dict) -> Dict:
-    sig = sign_payload(payload)
+def sign_payload(payload: Dict) -> str:
+    return sign_body(encode_json(payload))
+
+async def post_webhook(url: str, payload: Union[Dict, bytes]) -> Dict:
+    # sign exactly the bytes that go on the wire; pre-encoded results are reused as-is
+    body = payload if isinstance(payload, bytes) else encode_json(payload)
     headers = {
         "Content-Type": "application/json",
-        "X-Intelliparse-Signature": sig,
+        "X-Intelliparse-Signature": sign_body(body),
     }
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.post(url, json=payload, headers=headers)
-        return {"status_code": r.status_code, "text": r.text}
+    try:
+        with timed("powerai_webhook_seconds"):
+            async with httpx.AsyncClient(timeout=10) as client:
+                r = await client.post(url, content=body, headers=headers)
+    except Exception:
+        inc("powerai_webhook_total", outcome="error")
+        raise
+    inc("powerai_webhook_total", outcome="ok" if r.status_code < 400 else "http_error")
+    return {"status_code": r.status_code, "text": r.text}